@@ -0,0 +1,74 @@
+import random
+import sys
+import timeit
+from bench_corpus import WORDS
+from split_delim import BlockType, lex_block
+
+# Reference copy of the original classifier and the per-converter line
+# splitting that followed it, kept so the benchmark can show the gain of
+# lex_block over it and check the two still agree.
+
+def legacy_block_to_block_type(block):
+    if block.startswith("#"):
+        count = 0
+        for char in block:
+            if char == "#":
+                count += 1
+            else:
+                break
+        if 1 <= count <=6 and len(block) > count and block[count] == " ":
+            return BlockType.HEADING
+    if block.startswith("```") and block.endswith("```"):
+        return BlockType.CODE
+    lines = block.split("\n")
+    if all(line.startswith("- ") for line in lines):
+        return BlockType.UNORDERED_LIST
+    if all(line.startswith(">") for line in lines):
+        return BlockType.QUOTE
+    for i, line in enumerate(lines):
+        if not line.startswith(f"{i + 1}. "):
+            return BlockType.PARAGRAPH
+    return BlockType.ORDERED_LIST
+
+def legacy_lex_block(block):
+    block_type = legacy_block_to_block_type(block)
+    if block_type == BlockType.HEADING:
+        count = len(block) - len(block.lstrip("#"))
+        return block_type, (count, block[count + 1:])
+    if block_type == BlockType.CODE:
+        return block_type, block[3:-3].lstrip("\n")
+    lines = block.split("\n")
+    if block_type == BlockType.UNORDERED_LIST:
+        return block_type, [line[2:] for line in lines]
+    if block_type == BlockType.ORDERED_LIST:
+        return block_type, [line[line.index(". ") + 2:] for line in lines]
+    if block_type == BlockType.QUOTE:
+        return block_type, [line[2:] if line.startswith("> ") else line[1:] for line in lines]
+    return block_type, lines
+
+def list_blocks(rng, count, items):
+    blocks = []
+    for _ in range(count):
+        ordered = rng.random() < 0.5
+        lines = []
+        for i in range(1, items + 1):
+            marker = f"{i}." if ordered else "-"
+            lines.append(f"{marker} {rng.choice(WORDS)} {rng.choice(WORDS)}")
+        blocks.append("\n".join(lines))
+    return blocks
+
+def bench(items=(5, 50, 500, 5000), repeat=3):
+    rng = random.Random(0)
+    print(f"{'items/list':>10} {'legacy ms':>10} {'lexer ms':>9} {'speedup':>9}")
+    for size in items:
+        blocks = list_blocks(rng, max(1, 20000 // size), size)
+        for block in blocks:
+            if legacy_lex_block(block) != lex_block(block):
+                raise Exception(f"results differ for a list of {size} items")
+        legacy = min(timeit.repeat(lambda: [legacy_lex_block(b) for b in blocks], number=5, repeat=repeat)) / 5
+        lexer = min(timeit.repeat(lambda: [lex_block(b) for b in blocks], number=5, repeat=repeat)) / 5
+        print(f"{size:>10} {legacy * 1000:>10.2f} {lexer * 1000:>9.2f} {legacy / lexer:>8.1f}x")
+
+if __name__ == "__main__":
+    items = [int(arg) for arg in sys.argv[1:]] or (5, 50, 500, 5000)
+    bench(items)
@@ -0,0 +1,103 @@
+import os
+import random
+import sys
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+WORDS = (
+    "ring hobbit shire elf dwarf wizard river mountain forest road tower "
+    "king sword song star light shadow ship harbour council fellowship"
+).split()
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def _paragraph(rng, sentences=4):
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+def _link_paragraph(rng, links=40):
+    parts = []
+    for i in range(links):
+        word = rng.choice(WORDS)
+        parts.append(f"see [{word} {i}](/pages/{word}/{i}) and ![{word}](/images/{word}{i}.png)")
+    return ", ".join(parts) + "."
+
+def _list_block(rng, items=30, ordered=False):
+    lines = []
+    for i in range(1, items + 1):
+        marker = f"{i}." if ordered else "-"
+        lines.append(f"{marker} {_sentence(rng, 6)} **{rng.choice(WORDS)}** and `{rng.choice(WORDS)}`")
+    return "\n".join(lines)
+
+def _code_block(rng, lines=25):
+    body = "\n".join(f"    let {rng.choice(WORDS)}_{i} = {i};" for i in range(lines))
+    return f"```\nfn main() {{\n{body}\n}}\n```"
+
+def _mixed_section(rng):
+    return [
+        f"## {_sentence(rng, 4)}",
+        _paragraph(rng),
+        f"A **bold {rng.choice(WORDS)}** word, an _italic {rng.choice(WORDS)}_ one and [a link](/pages/{rng.choice(WORDS)}).",
+        _list_block(rng, 5),
+        f"> {_sentence(rng)}\n> {_sentence(rng)}",
+    ]
+
+def page_markdown(shape, rng, sections):
+    blocks = [f"# {_sentence(rng, 3)}"]
+    for _ in range(sections):
+        if shape == "links":
+            blocks.append(_link_paragraph(rng))
+        elif shape == "lists":
+            blocks.append(_list_block(rng, ordered=rng.random() < 0.5))
+        elif shape == "code":
+            blocks.append(_paragraph(rng, 1))
+            blocks.append(_code_block(rng))
+        else:
+            blocks.extend(_mixed_section(rng))
+    return "\n\n".join(blocks)
+
+# name -> (page shape, number of pages, sections per page) at scale 1
+SHAPES = {
+    "small": ("mixed", 2000, 1),
+    "huge": ("mixed", 4, 2500),
+    "links": ("links", 100, 40),
+    "lists": ("lists", 100, 40),
+    "code": ("code", 100, 40),
+}
+
+def generate_corpus(root, name, scale=1.0, seed=0):
+    # Writes content/, static/ and template.html under root and returns
+    # the number of pages written
+    shape, pages, sections = SHAPES[name]
+    pages = max(1, int(pages * scale))
+    rng = random.Random(f"{name}-{seed}")
+    for i in range(pages):
+        # Spread pages over nested sections like a real site
+        page_dir = os.path.join(root, "content", f"section{i % 10}", f"group{i // 100}", f"page{i}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(page_markdown(shape, rng, sections))
+    os.makedirs(os.path.join(root, "static"), exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(TEMPLATE)
+    return pages
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"usage: {sys.argv[0]} ROOT SHAPE [SCALE]   shapes: {', '.join(SHAPES)}")
+        sys.exit(2)
+    scale = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    count = generate_corpus(sys.argv[1], sys.argv[2], scale)
+    print(f"Wrote {count} {sys.argv[2]} pages to {sys.argv[1]}")
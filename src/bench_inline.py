@@ -0,0 +1,96 @@
+import re
+import sys
+import timeit
+from textnode import TextNode, TextType
+from split_delim import split_nodes_delimiter, text_to_textnodes
+
+# Reference copy of the original five-pass pipeline, kept here so the
+# benchmark can show the gain over it and check the results still match.
+
+def _legacy_split_nodes_image(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.PLAIN_TEXT:
+            new_nodes.append(node)
+            continue
+        images = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", node.text)
+        if not images:
+            new_nodes.append(node)
+            continue
+        remaining_text = node.text
+        for alt, url in images:
+            sections = remaining_text.split(f"![{alt}]({url})", 1)
+            if sections[0]:
+                new_nodes.append(TextNode(sections[0], TextType.PLAIN_TEXT))
+            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
+            remaining_text = sections[1]
+        if remaining_text:
+            new_nodes.append(TextNode(remaining_text, TextType.PLAIN_TEXT))
+    return new_nodes
+
+def _legacy_split_nodes_link(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.PLAIN_TEXT:
+            new_nodes.append(node)
+            continue
+        links = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", node.text)
+        if not links:
+            new_nodes.append(node)
+            continue
+        remaining_text = node.text
+        for alt, url in links:
+            sections = remaining_text.split(f"[{alt}]({url})", 1)
+            if sections[0]:
+                new_nodes.append(TextNode(sections[0], TextType.PLAIN_TEXT))
+            new_nodes.append(TextNode(alt, TextType.LINK, url))
+            remaining_text = sections[1]
+        if remaining_text:
+            new_nodes.append(TextNode(remaining_text, TextType.PLAIN_TEXT))
+    return new_nodes
+
+def legacy_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.PLAIN_TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD_TEXT)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC_TEXT)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE_TEXT)
+    nodes = _legacy_split_nodes_image(nodes)
+    nodes = _legacy_split_nodes_link(nodes)
+    return nodes
+
+def mixed_paragraph(count):
+    parts = []
+    for i in range(count):
+        parts.append(
+            f"see [page {i}](https://example.com/page{i}) and "
+            f"![figure {i}](/images/fig{i}.png) with **bold {i}**, `code {i}` and _emphasis_. "
+        )
+    return "".join(parts)
+
+def link_dense_paragraph(count):
+    # No delimiters, so every link and image sits in one long plain segment
+    parts = []
+    for i in range(count):
+        parts.append(f"see [page {i}](https://example.com/page{i}) and ![figure {i}](/images/fig{i}.png) then ")
+    return "".join(parts)
+
+SHAPES = {
+    "mixed": mixed_paragraph,
+    "link-dense": link_dense_paragraph,
+}
+
+def bench(sizes=(100, 1000, 5000, 20000), repeat=3):
+    print(f"{'shape':<12} {'links':>8} {'legacy ms':>12} {'single-pass ms':>15} {'speedup':>9}")
+    for name, make_paragraph in SHAPES.items():
+        for size in sizes:
+            text = make_paragraph(size)
+            if legacy_text_to_textnodes(text) != text_to_textnodes(text):
+                raise Exception(f"results differ for {name} paragraph with {size} links")
+            number = max(1, 2000 // size)
+            legacy = min(timeit.repeat(lambda: legacy_text_to_textnodes(text), number=number, repeat=repeat)) / number
+            single = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=repeat)) / number
+            print(f"{name:<12} {size:>8} {legacy * 1000:>12.2f} {single * 1000:>15.2f} {legacy / single:>8.1f}x")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or (100, 1000, 5000, 20000)
+    bench(sizes)
@@ -0,0 +1,83 @@
+import sys
+import tracemalloc
+from textnode import TextNode
+from htmlnode import LeafNode, ParentNode
+from split_delim import markdown_to_blocks, text_to_textnodes
+from markdown_to_html import markdown_to_html_node
+
+# Dict-backed equivalents of the node classes, used as the baseline the
+# slotted classes are measured against.
+
+class _DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+class _DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+def large_page(sections):
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}")
+        parts.append(
+            f"Paragraph {i} has **bold**, _italic_, `code`, a [link](/page/{i}) "
+            f"and an ![image](/images/{i}.png) in it."
+        )
+        parts.append("\n".join(f"- item {j} with [a link](/item/{j}) and **text**" for j in range(10)))
+        parts.append("\n".join(f"{j}. step {j} uses `tool {j}`" for j in range(1, 6)))
+        parts.append(f"> quoted line {i}\n> another _quoted_ line")
+    return "\n\n".join(parts)
+
+def _copy_text_nodes(nodes, cls):
+    return [cls(node.text, node.text_type, node.url) for node in nodes]
+
+def _copy_tree(node, leaf_cls, parent_cls):
+    if node.children is None:
+        return leaf_cls(node.tag, node.value, node.props)
+    children = [_copy_tree(child, leaf_cls, parent_cls) for child in node.children]
+    return parent_cls(node.tag, children, node.props)
+
+def _dict_leaf(tag, value, props):
+    return _DictHTMLNode(tag, value, None, props)
+
+def _dict_parent(tag, children, props):
+    return _DictHTMLNode(tag, None, children, props)
+
+def _measure(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+def _count(node):
+    if node.children is None:
+        return 1
+    return 1 + sum(_count(child) for child in node.children)
+
+def bench(sections=2000):
+    markdown = large_page(sections)
+    text_nodes = []
+    for block in markdown_to_blocks(markdown):
+        text_nodes.extend(text_to_textnodes(" ".join(block.split("\n"))))
+    tree = markdown_to_html_node(markdown)
+
+    # Copies share the original strings, so the difference is node overhead
+    slotted_text, _ = _measure(lambda: _copy_text_nodes(text_nodes, TextNode))
+    dict_text, _ = _measure(lambda: _copy_text_nodes(text_nodes, _DictTextNode))
+    slotted_tree, _ = _measure(lambda: _copy_tree(tree, LeafNode, ParentNode))
+    dict_tree, _ = _measure(lambda: _copy_tree(tree, _dict_leaf, _dict_parent))
+
+    print(f"page: {len(markdown) / 1024:.0f} KiB of Markdown, {len(text_nodes)} text nodes, {_count(tree)} HTML nodes")
+    print(f"{'nodes':<10} {'dict KiB':>10} {'slots KiB':>10} {'saved':>7}")
+    for name, before, after in (("TextNode", dict_text, slotted_text), ("HTMLNode", dict_tree, slotted_tree)):
+        print(f"{name:<10} {before / 1024:>10.0f} {after / 1024:>10.0f} {1 - after / before:>6.0%}")
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from bench_corpus import SHAPES, generate_corpus
+from generate_page import generate_pages_recursive
+from profiler import BuildProfile
+
+DEFAULT_BASELINE = "bench_baseline.json"
+
+def _source_bytes(root):
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
+
+def bench_shape(name, scale=1.0, repeat=3, jobs=1):
+    with tempfile.TemporaryDirectory() as root:
+        pages = generate_corpus(root, name, scale)
+        content = os.path.join(root, "content")
+        size = _source_bytes(content)
+        best = None
+        for i in range(repeat):
+            profile = BuildProfile()
+            dest = os.path.join(root, f"docs{i}")
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                generate_pages_recursive(content, os.path.join(root, "template.html"), dest, "/", jobs=jobs, profile=profile)
+            profile.wall = time.perf_counter() - start
+            if best is None or profile.wall < best.wall:
+                best = profile
+    return {
+        "pages": pages,
+        "bytes": size,
+        "wall": best.wall,
+        "pages_per_s": pages / best.wall,
+        "mb_per_s": size / best.wall / 1e6,
+        "stages": best.exclusive_stages(),
+    }
+
+def compare(results, baseline, tolerance):
+    # Returns the shapes whose throughput fell more than tolerance below
+    # the baseline
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        floor = baseline[name]["mb_per_s"] * (1 - tolerance)
+        if result["mb_per_s"] < floor:
+            regressions.append(name)
+    return regressions
+
+def report(results, baseline):
+    lines = [f"{'shape':<8} {'pages':>7} {'MB':>7} {'wall s':>8} {'pages/s':>9} {'MB/s':>7} {'vs base':>8}  top stages"]
+    for name, result in results.items():
+        delta = ""
+        if name in baseline:
+            delta = f"{result['mb_per_s'] / baseline[name]['mb_per_s'] - 1:+.0%}"
+        stages = sorted(result["stages"].items(), key=lambda item: item[1], reverse=True)[:3]
+        top = ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in stages)
+        lines.append(
+            f"{name:<8} {result['pages']:>7} {result['bytes'] / 1e6:>7.2f} {result['wall']:>8.3f} "
+            f"{result['pages_per_s']:>9.0f} {result['mb_per_s']:>7.2f} {delta:>8}  {top}"
+        )
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time full builds of synthetic content trees")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the page count of every shape")
+    parser.add_argument("--repeat", type=int, default=3, help="builds per shape; the fastest is kept")
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed throughput drop before failing")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.shapes:
+        results[name] = bench_shape(name, args.scale, args.repeat, args.jobs)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(report(results, baseline))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Throughput regressed more than {args.tolerance:.0%} for: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import shutil
+
+# Bump whenever markdown_to_html_node output changes for the same source, so
+# fragments cached by older parsers are never reused
+PARSER_VERSION = "1"
+
+DEFAULT_CACHE_DIR = ".build/cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class FragmentCache:
+    # On-disk cache of rendered body fragments (the to_html() of a page's
+    # Markdown, before templating and basepath rewriting) keyed by the hash
+    # of the source. Recency is tracked through file mtimes, which get() bumps,
+    # so entries can be shared safely between worker processes.
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, markdown):
+        return hashlib.sha256(f"{PARSER_VERSION}\0{markdown}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".html")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                fragment = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return fragment
+
+    def put(self, key, fragment):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(fragment)
+        os.replace(tmp_path, path)
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        # Drops least recently used entries until the cache fits max_bytes;
+        # returns the number of entries removed
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+    def __repr__(self):
+        return f"FragmentCache({self.directory}, {self.max_bytes})"
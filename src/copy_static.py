@@ -1,23 +1,113 @@
 import os
 import shutil
+from manifest import load_manifest, save_manifest, remove_output
+from file_index import FileIndex, load_index, store_index
+from postprocess import MINIFIABLE_EXTENSIONS, COMPRESSORS, is_compressible, minify_output, remove_variants
+from writer import PageWriter
 
-def copy_static_to_public(src_dir="static", dest_dir="docs"):
-    if os.path.exists(dest_dir):
-        print(f"Deleting {dest_dir} directory...")
-        shutil.rmtree(dest_dir)
-    print(f"Creating {dest_dir} directory...")
-    os.mkdir(dest_dir)
-    _copy_directory_contents(src_dir, dest_dir)
+def sync_static(src_dir="static", dest_dir="docs", manifest_path=None, compare="mtime", index=None, assets=None, minify=False, compress=False):
+    # Copies only new or changed files and removes files whose source was
+    # deleted, leaving generated pages in dest_dir untouched. Files are
+    # compared by size and mtime, or by content hash when compare="hash".
+    # index is a FileIndex of src_dir, scanned here when not given. Files in
+    # the asset manifest assets are also copied to their fingerprinted names.
+    # With minify, CSS is minified on the way; with compress, text
+    # files get precompressed siblings. Both run on background threads and
+    # only for files that changed.
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    if index is None:
+        index = FileIndex.scan(src_dir, load_index(manifest, src_dir))
+    old_files = manifest.get("static", {})
+    new_files = {}
+    copied = 0
+    with PageWriter(compress=compress) as writer:
+        for rel_path in index:
+            src_path = index.path(rel_path)
+            indexed = index.files[rel_path]
+            entry = {"size": indexed["size"], "mtime": indexed["mtime"]}
+            if compare == "hash":
+                # Reused from the stored index while size and mtime are unchanged
+                entry["hash"] = index.hash(rel_path)
+            targets = [rel_path]
+            if assets:
+                fingerprinted = assets.get(rel_path.replace(os.sep, "/"))
+                if fingerprinted is not None:
+                    entry["fingerprint"] = fingerprinted
+                    targets.append(fingerprinted.replace("/", os.sep))
+            post = []
+            if minify and rel_path.endswith(MINIFIABLE_EXTENSIONS):
+                post.append("minify")
+            if compress and is_compressible(rel_path):
+                post.append("compress")
+            if post:
+                entry["post"] = post
+            new_files[rel_path] = entry
+            copied_file = False
+            for target in targets:
+                dest_path = os.path.join(dest_dir, target)
+                if _is_current(entry, old_files.get(rel_path), dest_path, compare):
+                    continue
+                print(f"Copying file: {src_path} -> {dest_path}")
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                if post:
+                    with open(src_path, 'rb') as f:
+                        data = f.read()
+                    if "minify" in post:
+                        data = minify_output(rel_path, data)
+                    writer.write(dest_path, data)
+                else:
+                    # copy2 preserves the mtime, which the next comparison relies on
+                    shutil.copy2(src_path, dest_path)
+                copied_file = True
+            copied += copied_file
 
-def _copy_directory_contents(src, dest):
-    items = os.listdir(src)
-    for item in items:
-        src_path = os.path.join(src, item)
-        dest_path = os.path.join(dest, item)
-        if os.path.isfile(src_path):
-            print(f"Copying file: {src_path} -> {dest_path}")
-            shutil.copy(src_path, dest_path)
+    removed = 0
+    for rel_path, old_entry in old_files.items():
+        new_entry = new_files.get(rel_path, {})
+        stale = []
+        if rel_path not in new_files:
+            stale.append(rel_path)
+        fingerprinted = old_entry.get("fingerprint")
+        if fingerprinted is not None and new_entry.get("fingerprint") != fingerprinted:
+            stale.append(fingerprinted.replace("/", os.sep))
+        if "compress" in old_entry.get("post", ()):
+            still_compressed = "compress" in new_entry.get("post", ())
+            old_targets = [rel_path] + ([fingerprinted.replace("/", os.sep)] if fingerprinted else [])
+            for target in old_targets:
+                if target in stale or not still_compressed:
+                    remove_variants(os.path.join(dest_dir, target))
+        for target in stale:
+            dest_path = os.path.join(dest_dir, target)
+            print(f"Removing stale file: {dest_path}")
+            remove_output(dest_path, dest_dir)
+            removed += 1
+
+    print(f"Synced {src_dir} -> {dest_dir}: {copied} copied, {removed} removed, {len(new_files) - copied} unchanged")
+    if manifest_path:
+        manifest["static"] = new_files
+        if assets:
+            manifest["assets"] = assets
         else:
-            print(f"Creating directory: {dest_path}")
-            os.mkdir(dest_path)
-            _copy_directory_contents(src_path, dest_path)
\ No newline at end of file
+            manifest.pop("assets", None)
+        store_index(manifest, index)
+        save_manifest(manifest, manifest_path)
+
+def _is_current(entry, old_entry, dest_path, compare):
+    if "post" in entry:
+        # Minified or compressed copies differ from their source in size and
+        # mtime, so they are current while the source matches the last sync
+        if old_entry is None or not os.path.exists(dest_path):
+            return False
+        if "compress" in entry["post"] and not all(os.path.exists(dest_path + suffix) for suffix in COMPRESSORS):
+            return False
+        return all(old_entry.get(key) == entry.get(key) for key in ("size", "mtime", "hash", "post"))
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != entry["size"]:
+        return False
+    if compare == "hash":
+        # Content equal to what was copied last time; mtimes may differ
+        return old_entry is not None and old_entry.get("hash") == entry["hash"]
+    return dest_stat.st_mtime_ns == entry["mtime"]
@@ -0,0 +1,56 @@
+class DependencyGraph:
+    # Maps every build output to the inputs it was produced from (source
+    # page, template, partials, referenced static files), with a reverse
+    # index so a set of changed inputs resolves to exactly the outputs that
+    # need rebuilding.
+
+    def __init__(self, edges=None):
+        self._inputs = {}
+        self._dependents = {}
+        for output, inputs in (edges or {}).items():
+            self.set_dependencies(output, inputs)
+
+    def set_dependencies(self, output, inputs):
+        self.remove_output(output)
+        inputs = set(inputs)
+        self._inputs[output] = inputs
+        for path in inputs:
+            self._dependents.setdefault(path, set()).add(output)
+
+    def remove_output(self, output):
+        for path in self._inputs.pop(output, ()):
+            dependents = self._dependents[path]
+            dependents.discard(output)
+            if not dependents:
+                del self._dependents[path]
+
+    def dependencies(self, output):
+        return set(self._inputs.get(output, ()))
+
+    def dependents(self, path):
+        return set(self._dependents.get(path, ()))
+
+    def affected(self, changed_inputs):
+        outputs = set()
+        for path in changed_inputs:
+            outputs |= self._dependents.get(path, set())
+        return outputs
+
+    def outputs(self):
+        return set(self._inputs)
+
+    def inputs(self):
+        return set(self._dependents)
+
+    def __contains__(self, output):
+        return output in self._inputs
+
+    def to_dict(self):
+        return {output: sorted(inputs) for output, inputs in self._inputs.items()}
+
+    @classmethod
+    def from_dict(cls, edges):
+        return cls(edges)
+
+    def __repr__(self):
+        return f"DependencyGraph({len(self._inputs)} outputs, {len(self._dependents)} inputs)"
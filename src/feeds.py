@@ -0,0 +1,150 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+from postprocess import COMPRESSORS, compress_file, remove_variants
+
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "atom.xml"
+# Most URLs one sitemap file may list; past it sitemap.xml becomes an index
+# of sitemap-1.xml, sitemap-2.xml, ...
+SITEMAP_LIMIT = 50000
+# Newest posts listed in the feed
+FEED_LIMIT = 20
+
+_SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+_W3C_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_EPOCH = "1970-01-01T00:00:00Z"
+
+class FeedOptions:
+    # sitemap.xml for the site served from site_url, its scheme and host, and
+    # with feed_dir, a directory of the content tree, an Atom feed of its posts
+
+    def __init__(self, site_url, feed_dir=None):
+        self.site_url = site_url
+        self.feed_dir = feed_dir
+
+    def __repr__(self):
+        return f"FeedOptions({self.site_url}, {self.feed_dir})"
+
+def absolute_url(site_url, url):
+    # site_url holds the scheme, host and basepath: "https://example.com/site"
+    return site_url.rstrip("/") + url
+
+def w3c_date(date):
+    # Front matter dates as Atom and sitemaps expect them, in UTC so feed
+    # entries sort by time; naive dates are taken as UTC. None if invalid.
+    if not date:
+        return None
+    try:
+        parsed = datetime.fromisoformat(date.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime(_W3C_FORMAT)
+
+def timestamp(mtime_ns):
+    return datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc).strftime(_W3C_FORMAT)
+
+def sitemap_chunks(entries, site_url):
+    # entries hold the "url" and optional "lastmod" of every page
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{_SITEMAP_NAMESPACE}">\n'
+    for entry in entries:
+        yield f"<url><loc>{escape(absolute_url(site_url, entry['url']))}</loc>"
+        if entry.get("lastmod"):
+            yield f"<lastmod>{escape(entry['lastmod'])}</lastmod>"
+        yield "</url>\n"
+    yield "</urlset>\n"
+
+def sitemap_index_chunks(names, site_url):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{_SITEMAP_NAMESPACE}">\n'
+    for name in names:
+        yield f"<sitemap><loc>{escape(absolute_url(site_url, '/' + name))}</loc></sitemap>\n"
+    yield "</sitemapindex>\n"
+
+def sitemap_files(entries, dest_dir, site_url):
+    # {output path: chunk generator factory} of the sitemap of entries
+    entries = sorted(entries, key=lambda entry: entry["url"])
+    sitemap_path = os.path.join(dest_dir, SITEMAP_NAME)
+    if len(entries) <= SITEMAP_LIMIT:
+        return {sitemap_path: lambda: sitemap_chunks(entries, site_url)}
+    files = {}
+    names = []
+    for number, start in enumerate(range(0, len(entries), SITEMAP_LIMIT), 1):
+        name = f"sitemap-{number}.xml"
+        part = entries[start:start + SITEMAP_LIMIT]
+        files[os.path.join(dest_dir, name)] = lambda part=part: sitemap_chunks(part, site_url)
+        names.append(name)
+    files[sitemap_path] = lambda: sitemap_index_chunks(names, site_url)
+    return files
+
+def feed_chunks(posts, site_url, title, blog_url, author):
+    # Atom feed of the FEED_LIMIT newest posts, each with a "url", "title"
+    # and "updated" timestamp
+    posts = sorted(posts, key=lambda post: (post["updated"], post["url"]), reverse=True)[:FEED_LIMIT]
+    blog_link = absolute_url(site_url, blog_url)
+    updated = posts[0]["updated"] if posts else _EPOCH
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f"<title>{escape(title)}</title>\n"
+    yield f"<id>{escape(blog_link)}</id>\n"
+    yield f"<link href={quoteattr(blog_link)}/>\n"
+    yield f'<link rel="self" href={quoteattr(absolute_url(site_url, blog_url + FEED_NAME))}/>\n'
+    yield f"<updated>{updated}</updated>\n"
+    yield f"<author><name>{escape(author)}</name></author>\n"
+    for post in posts:
+        link = absolute_url(site_url, post["url"])
+        yield "<entry>"
+        yield f"<title>{escape(post['title'] or post['url'])}</title>"
+        yield f"<id>{escape(link)}</id>"
+        yield f"<link href={quoteattr(link)}/>"
+        yield f"<updated>{post['updated']}</updated>"
+        yield "</entry>\n"
+    yield "</feed>\n"
+
+def _digest(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk.encode())
+    return digest.hexdigest()
+
+def write_streamed(path, chunks, previous=None, compress=False):
+    # Streams the chunks from chunks(), a generator factory, to path unless
+    # their digest matches previous, the digest of what path already holds,
+    # so the old file is never read back. Returns (digest, written).
+    digest = _digest(chunks())
+    unchanged = digest == previous and os.path.exists(path)
+    if not unchanged:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as out:
+            for chunk in chunks():
+                out.write(chunk)
+        os.replace(tmp_path, path)
+    if not compress:
+        remove_variants(path)
+    elif not unchanged or not all(os.path.exists(path + suffix) for suffix in COMPRESSORS):
+        compress_file(path)
+    return digest, not unchanged
+
+def write_feeds(files, state=None, compress=False):
+    # Writes {output path: chunk generator factory} and removes the files of
+    # state, {output path: digest} from the previous build, that are gone.
+    # Returns the new state.
+    state = state or {}
+    new_state = {}
+    written = 0
+    for path, chunks in files.items():
+        new_state[path], changed = write_streamed(path, chunks, state.get(path), compress)
+        written += changed
+    for path in sorted(state.keys() - new_state.keys()):
+        remove_feed(path)
+    if written:
+        print(f"Updated {written} sitemap and feed files")
+    return new_state
+
+def remove_feed(path):
+    print(f"Removing stale {path}")
+    remove_variants(path)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,98 @@
+import os
+import time
+from manifest import hash_file, load_manifest
+
+# A file modified this close to the previous scan may have changed again
+# within the same mtime tick, so its hash is recomputed instead of reused
+RACY_WINDOW_NS = 2 * 10**9
+
+def scan_tree(root):
+    # Walks root once with scandir, whose entries carry the file type, and
+    # returns {relative path: {"size", "mtime"}} for every file below it
+    files = {}
+    stack = [(root, "")]
+    while stack:
+        directory, rel_dir = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[rel_path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+                elif entry.is_dir():
+                    stack.append((entry.path, rel_path))
+    return files
+
+class FileIndex:
+    # Sizes, mtimes and, once computed, content hashes of the files below
+    # root. Persisted in the build manifest, so the next scan reuses the hash
+    # of every file whose size and mtime are unchanged.
+
+    def __init__(self, root, files=None, scanned=0):
+        self.root = root
+        self.files = files or {}
+        self.scanned = scanned
+
+    @classmethod
+    def scan(cls, root, previous=None):
+        scanned = time.time_ns()
+        files = scan_tree(root)
+        if previous is not None:
+            for rel_path, entry in files.items():
+                old = previous.files.get(rel_path)
+                if (
+                    old is not None and "hash" in old
+                    and old["size"] == entry["size"] and old["mtime"] == entry["mtime"]
+                    and old["mtime"] < previous.scanned - RACY_WINDOW_NS
+                ):
+                    entry["hash"] = old["hash"]
+        return cls(root, files, scanned)
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def rel_path(self, path):
+        # The key of path, which may lie outside root, or None
+        rel_path = os.path.relpath(path, self.root)
+        return rel_path if rel_path in self.files else None
+
+    def __contains__(self, rel_path):
+        return rel_path in self.files
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def signature(self, rel_path):
+        entry = self.files[rel_path]
+        return f"{entry['size']}:{entry['mtime']}"
+
+    def hash(self, rel_path):
+        entry = self.files[rel_path]
+        if "hash" not in entry:
+            entry["hash"] = hash_file(self.path(rel_path))
+        return entry["hash"]
+
+    def to_dict(self):
+        return {"scanned": self.scanned, "files": self.files}
+
+    @classmethod
+    def from_dict(cls, root, data):
+        return cls(root, data.get("files", {}), data.get("scanned", 0))
+
+    def __repr__(self):
+        return f"FileIndex({self.root}, {len(self.files)} files)"
+
+def load_index(manifest, root):
+    data = manifest.get("index", {}).get(root)
+    return FileIndex.from_dict(root, data) if data else None
+
+def store_index(manifest, index):
+    manifest.setdefault("index", {})[index.root] = index.to_dict()
+
+def scan_index(root, manifest_path=None):
+    # Scans root, reusing the hashes of the index stored in the manifest
+    previous = load_index(load_manifest(manifest_path), root) if manifest_path else None
+    return FileIndex.scan(root, previous)
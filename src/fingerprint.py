@@ -0,0 +1,25 @@
+import os
+
+# Static files that get a content-addressed copy; others, such as
+# favicon.ico or robots.txt, are fetched by fixed name
+FINGERPRINT_EXTENSIONS = (
+    ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif",
+    ".woff", ".woff2", ".ttf",
+)
+HASH_LENGTH = 8
+
+def fingerprint_path(rel_path, digest):
+    # "css/index.css" -> "css/index.3f9a1c2b.css"
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+def build_asset_manifest(static_index):
+    # Maps the URL path of every fingerprintable file in the index, without
+    # the leading slash, to its fingerprinted URL path. Hashes come from the
+    # index, so only new or changed files are read.
+    assets = {}
+    for rel_path in static_index:
+        if rel_path.lower().endswith(FINGERPRINT_EXTENSIONS):
+            url_path = rel_path.replace(os.sep, "/")
+            assets[url_path] = fingerprint_path(url_path, static_index.hash(rel_path))
+    return assets
@@ -0,0 +1,180 @@
+import os
+import re
+
+# ---
+# title: A post
+# date: 2024-03-01
+# tags: [elves, rings]
+# draft: true
+# layout: layouts/post.html
+# ---
+FRONT_MATTER_DELIMITER = "---"
+# A block not closed within this many lines is treated as ordinary text
+MAX_FRONT_MATTER_LINES = 100
+
+_BOOLEANS = {
+    "true": True, "yes": True, "on": True, "1": True,
+    "false": False, "no": False, "off": False, "0": False,
+}
+# Keys whose value may be a block list of "- item" lines under a bare "key:"
+_LIST_KEYS = {"tags"}
+# "key: value", or a bare "key:"
+_FIELD_PATTERN = re.compile(r"([A-Za-z_][\w-]*):(?:\s(.*))?$")
+
+def _scalar(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+def _value(key, value):
+    value = value.strip()
+    if key == "tags":
+        if value.startswith("[") and value.endswith("]"):
+            value = value[1:-1]
+        return [_scalar(tag) for tag in value.split(",") if tag.strip()]
+    if key == "draft":
+        flag = _BOOLEANS.get(_scalar(value).lower())
+        if flag is None:
+            raise Exception(f"draft: {value} is not one of {', '.join(_BOOLEANS)}")
+        return flag
+    return _scalar(value)
+
+def parse_front_matter(lines):
+    # Parses a front matter block from the start of an iterable of lines and
+    # returns (metadata, number of lines it spans), or ({}, 0) when the lines
+    # do not start with a closed block of fields, such as a page opening
+    # with a "---" paragraph. Only the block itself is consumed.
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None or first.rstrip("\r\n") != FRONT_MATTER_DELIMITER:
+        return {}, 0
+    block = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line == FRONT_MATTER_DELIMITER:
+            metadata = _parse_block(block)
+            return (metadata, len(block) + 2) if metadata else ({}, 0)
+        block.append(line)
+        if len(block) + 1 >= MAX_FRONT_MATTER_LINES:
+            break
+    return {}, 0
+
+def _parse_block(block):
+    # The fields of a block, or None when any line is not one, so the block
+    # is left to render as Markdown
+    metadata = {}
+    list_key = None
+    for line in block:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("- "):
+            # Block list under a bare "tags:"; under any other key, or none,
+            # the block is not front matter
+            if list_key not in _LIST_KEYS:
+                return None
+            metadata.setdefault(list_key, []).append(_scalar(stripped[2:]))
+            continue
+        match = _FIELD_PATTERN.match(line)
+        if match is None:
+            return None
+        key, value = match.groups()
+        list_key = None
+        if value and value.strip():
+            metadata[key] = _value(key, value)
+        else:
+            list_key = key
+    return metadata or None
+
+def split_front_matter(markdown):
+    # (metadata, body) of a whole document
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return {}, markdown
+    lines = markdown.split("\n")
+    metadata, count = parse_front_matter(lines)
+    if not count:
+        return {}, markdown
+    return metadata, "\n".join(lines[count:])
+
+def read_metadata(path):
+    # Reads only the head of the file: the front matter and, when it sets no
+    # title, the lines up to the first h1. The title is None without either.
+    with open(path, 'r') as f:
+        try:
+            metadata = read_front_matter(f)
+        except Exception as error:
+            raise Exception(f"{path}: {error}") from error
+        if "title" not in metadata:
+            metadata["title"] = None
+            for line in f:
+                if line.startswith("# "):
+                    metadata["title"] = line[2:].strip()
+                    break
+    return metadata
+
+def read_front_matter(f):
+    # Metadata from the front matter of an open file, leaving f at the start
+    # of the body
+    metadata, count = parse_front_matter(_head(f))
+    if not count:
+        f.seek(0)
+    return metadata
+
+def _head(f):
+    # Lines of f, read one at a time so nothing past the block is consumed
+    for _ in range(MAX_FRONT_MATTER_LINES):
+        line = f.readline()
+        if not line:
+            return
+        yield line
+
+class MetadataIndex:
+    # Front matter of every page, keyed by source path. An entry is reused
+    # while its source hash is unchanged, so unchanged files are not opened
+    # again; persisted in the build manifest.
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def refresh(self, sources, content_index=None):
+        # Brings the index in line with sources; content_index, a FileIndex,
+        # supplies the hashes. Without one every file is read.
+        entries = {}
+        for src_path in sources:
+            digest = None
+            if content_index is not None:
+                digest = content_index.hash(content_index.rel_path(src_path))
+                old = self.entries.get(src_path)
+                if old is not None and old["hash"] == digest:
+                    entries[src_path] = old
+                    continue
+            entries[src_path] = {"hash": digest, "meta": read_metadata(src_path)}
+        self.entries = entries
+
+    def get(self, src_path):
+        entry = self.entries.get(src_path)
+        return entry["meta"] if entry is not None else {}
+
+    def pages(self, drafts=False, under=None):
+        # (source path, metadata) of every page, sorted by path; drafts are
+        # left out unless asked for, and under limits them to a directory
+        pages = []
+        for src_path in sorted(self.entries):
+            meta = self.entries[src_path]["meta"]
+            if meta.get("draft") and not drafts:
+                continue
+            if under is not None and not src_path.startswith(os.path.join(under, "")):
+                continue
+            pages.append((src_path, meta))
+        return pages
+
+    def to_dict(self):
+        return self.entries
+
+    @classmethod
+    def from_dict(cls, entries):
+        return cls(dict(entries))
+
+    def __repr__(self):
+        return f"MetadataIndex({len(self.entries)} pages)"
@@ -1,47 +1,517 @@
+import filecmp
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from markdown_to_html import markdown_to_html_node
+from urllib.parse import urlparse
+from markdown_to_html import markdown_to_html_node, write_markdown_html
+from template import LayoutResolver, find_root_urls, load_template
+from depgraph import DependencyGraph
+from profiler import BuildProfile, stage
+from manifest import GENERATOR_VERSION, hash_bytes, hash_file, load_manifest, output_url, save_manifest, remove_output
+from writer import PageWriter, make_dirs, write_output
+from postprocess import COMPRESSORS, compress_file, minify_html, remove_variants
+from search_index import SEARCH_DIR, SearchIndex, TermCollector, node_terms, page_terms, remove_search_index
+from file_index import FileIndex, load_index, store_index
+from front_matter import MetadataIndex, read_front_matter, split_front_matter
+from listings import generate_listings, remove_listings
+from links import LinkChecker, page_links, report_broken, resolve
+from feeds import FEED_NAME, feed_chunks, remove_feed, sitemap_files, timestamp, w3c_date, write_feeds
+
+# Sources at least this large are streamed block by block to the output
+# instead of being read and rendered as whole strings
+STREAM_THRESHOLD = 16 * 1024 * 1024
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
+    return extract_title_from_lines(markdown.split("\n"))
+
+def extract_title_from_lines(lines):
     for line in lines:
         if line.startswith("# "):
             return line[2:].strip()
     raise Exception("no h1 found")
 
 def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} using {template_path}")
+    render_page(from_path, load_template(template_path, basepath), dest_path)
+
+class RenderOptions:
+    # What render_page does besides rendering; picklable, so one instance is
+    # shared by every page of a build and sent to the worker processes.
+    # With a FragmentCache as cache the body HTML of an unchanged source is
+    # reused. minify collapses the HTML of every page written and compress
+    # writes precompressed copies next to it. search counts the terms of
+    # every body for the search index, or with search_positions records
+    # where they occur, and links collects its internal URLs for the link
+    # checker.
+
+    def __init__(self, cache=None, minify=False, compress=False, search=False, links=False, search_positions=False):
+        self.cache = cache
+        self.minify = minify
+        self.compress = compress
+        self.search = search
+        self.links = links
+        self.search_positions = search_positions
+
+    def __repr__(self):
+        return (
+            f"RenderOptions(cache={self.cache!r}, minify={self.minify}, compress={self.compress}, "
+            f"search={self.search}, links={self.links}, search_positions={self.search_positions})"
+        )
+
+def render_page(from_path, template, dest_path, options=None, profile=False, write=None):
+    # Returns a picklable dict describing the page, so results from worker
+    # processes can be merged: "refs" lists the root-relative URLs the body
+    # links to, "unchanged" whether the output already held these bytes, and
+    # with profile=True "profile" holds the page timed stage by stage. The
+    # page is handed to write(dest_path, data), such as PageWriter.write,
+    # when given and written in place otherwise. options is a RenderOptions;
+    # streamed pages are never minified. With options.search "search" holds
+    # the title and the terms of the body, as page_terms returns them, and
+    # with options.links "links" the internal URLs it links to. A front
+    # matter title takes precedence over the first h1.
+    print(f"Generating page from {from_path} using {template.path}")
+    if options is None:
+        options = RenderOptions()
+    cache = options.cache
+    page_profile = BuildProfile() if profile else None
+    if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+        return stream_page(from_path, template, dest_path, page_profile, options)
+    with stage(page_profile, "read"):
+        with open(from_path, 'r') as f:
+            markdown_content = f.read()
+        metadata, body = split_front_matter(markdown_content)
+    html_content = None
+    html_node = None
+    if cache is not None:
+        with stage(page_profile, "cache"):
+            cache_key = cache.key(markdown_content)
+            html_content = cache.get(cache_key)
+        if page_profile is not None:
+            page_profile.count("cache_hits" if html_content is not None else "cache_misses")
+    if html_content is None:
+        html_node = markdown_to_html_node(body, page_profile)
+        with stage(page_profile, "to_html"):
+            html_content = html_node.to_html()
+        if cache is not None:
+            with stage(page_profile, "cache"):
+                cache.put(cache_key, html_content)
+    with stage(page_profile, "template"):
+        title = metadata.get("title") or extract_title(body)
+        final_html = template.render(title, html_content)
+        if options.minify:
+            final_html = minify_html(final_html)
+
+    with stage(page_profile, "write"):
+        data = final_html.encode()
+        unchanged = False
+        if write is None:
+            unchanged = not write_output(dest_path, data, options.compress)
+        else:
+            write(dest_path, data)
+
+    terms = None
+    if options.search:
+        with stage(page_profile, "search"):
+            # A cached fragment has no nodes, so its tags are stripped instead
+            terms = (
+                node_terms(html_node, options.search_positions) if html_node is not None
+                else page_terms(html_content, options.search_positions)
+            )
+
+    internal_links = None
+    if options.links:
+        with stage(page_profile, "links"):
+            internal_links = page_links(html_content)
+
+    return _page_result(find_root_urls(html_content), page_profile, len(data), unchanged, title, terms, internal_links)
+
+def _page_result(refs, page_profile, bytes_written, unchanged=False, title=None, terms=None, links=None):
+    result = {"refs": refs, "unchanged": unchanged, "profile": None}
+    if terms is not None:
+        result["search"] = {"title": title, "terms": terms}
+    if links is not None:
+        result["links"] = links
+    if page_profile is not None:
+        page_profile.count("pages")
+        page_profile.count("bytes_written", bytes_written)
+        result["profile"] = page_profile.to_dict(raw=True)
+    return result
+
+def stream_page(from_path, template, dest_path, page_profile=None, options=None):
+    # Peak memory is bounded by the largest block rather than the page: the
+    # title is found by a first pass that stops at the first h1, and the body
+    # is converted and written one block at a time
+    if options is None:
+        options = RenderOptions()
     with open(from_path, 'r') as f:
-        markdown_content = f.read()
-    with open(template_path, 'r') as f:
-        template_content = f.read()
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
-    title = extract_title(markdown_content)
+        title = read_front_matter(f).get("title") or extract_title_from_lines(f)
 
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
+    blocks = 0
+    refs = []
+    internal_links = []
+    collector = None
 
-    # Replace root paths with basepath for deployment
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
+    def write_content(write):
+        nonlocal blocks, collector
+
+        def write_and_scan(chunk):
+            refs.extend(find_root_urls(chunk))
+            if options.links:
+                internal_links.extend(page_links(chunk))
+            if collector is not None:
+                collector.feed(chunk)
+            write(chunk)
+
+        refs.clear()
+        internal_links.clear()
+        if options.search:
+            collector = TermCollector(options.search_positions)
+        with open(from_path, 'r') as f:
+            read_front_matter(f)
+            blocks = write_markdown_html(f, write_and_scan)
 
     dest_dir = os.path.dirname(dest_path)
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
-
-    with open(dest_path, 'w') as f:
-        f.write(final_html)
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
-    items = os.listdir(dir_path_content)
-    for item in items:
-        src_path = os.path.join(dir_path_content, item)
-        if os.path.isfile(src_path):
-            if item.endswith(".md"):
-                dest_file = item.replace(".md", ".html")
-                dest_path = os.path.join(dest_dir_path, dest_file)
-                generate_page(src_path, template_path, dest_path, basepath)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    # Streamed next to the output and swapped in only if it differs, so an
+    # unchanged page keeps its mtime
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    written = 0
+    with stage(page_profile, "stream"):
+        with open(tmp_path, 'w') as out:
+            write = out.write
+            if page_profile is not None:
+                def write(chunk):
+                    nonlocal written
+                    written += len(chunk.encode())
+                    out.write(chunk)
+            template.stream(write, title, write_content)
+        unchanged = os.path.exists(dest_path) and filecmp.cmp(tmp_path, dest_path, shallow=False)
+        if unchanged:
+            os.remove(tmp_path)
         else:
-            new_dest_dir = os.path.join(dest_dir_path, item)
-            generate_pages_recursive(src_path, template_path, new_dest_dir, basepath)
\ No newline at end of file
+            os.replace(tmp_path, dest_path)
+        if options.compress and (not unchanged or not all(os.path.exists(dest_path + suffix) for suffix in COMPRESSORS)):
+            compress_file(dest_path)
+
+    if page_profile is not None:
+        page_profile.count("blocks", blocks)
+    terms = dict(collector.terms) if collector is not None else ({} if options.search else None)
+    internal_links = list(dict.fromkeys(internal_links)) if options.links else None
+    return _page_result(refs, page_profile, written, unchanged, title, terms, internal_links)
+
+def find_pages(dir_path_content, dest_dir_path, index=None):
+    # index is a FileIndex of dir_path_content; without one the tree is scanned
+    if index is None:
+        index = FileIndex.scan(dir_path_content)
+    pages = []
+    for rel_path in index:
+        rel_dir, item = os.path.split(rel_path)
+        if item.endswith(".md"):
+            dest_file = item.replace(".md", ".html")
+            pages.append((index.path(rel_path), os.path.join(dest_dir_path, rel_dir, dest_file)))
+    return pages
+
+def generate_pages(pages, jobs=1, profile=None, options=None):
+    # pages holds (source, destination, template) triples, all rendered with
+    # options, a RenderOptions
+    if options is None:
+        options = RenderOptions()
+    with stage(profile, "write"):
+        make_dirs(dest_path for _, dest_path, _ in pages)
+    if jobs <= 1 or len(pages) < 2:
+        # Rendering goes on while earlier pages are written in the background
+        writer = PageWriter(compress=options.compress)
+        try:
+            results = [
+                render_page(src_path, template, dest_path, options, profile is not None, writer.write)
+                for src_path, dest_path, template in pages
+            ]
+        finally:
+            with stage(profile, "write"):
+                writer.close()
+        unchanged = writer.unchanged + sum(result["unchanged"] for result in results)
+    else:
+        # Batch pages per task so small pages do not drown in IPC overhead
+        chunksize = max(1, len(pages) // (jobs * 8))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # Consume the results so worker exceptions propagate
+            results = list(executor.map(
+                partial(render_page, options=options, profile=profile is not None),
+                [src_path for src_path, _, _ in pages],
+                [template for _, _, template in pages],
+                [dest_path for _, dest_path, _ in pages],
+                chunksize=chunksize,
+            ))
+        unchanged = sum(result["unchanged"] for result in results)
+    if unchanged:
+        print(f"Left {unchanged} pages with identical output untouched")
+    if profile is not None:
+        for (src_path, _, _), result in zip(pages, results):
+            profile.add_page(src_path, result["profile"])
+    if options.cache is not None and pages:
+        removed = options.cache.evict()
+        if removed:
+            print(f"Evicted {removed} entries from the fragment cache")
+    return results
+
+def _static_file(url, static_index):
+    # The file in the static tree a root-relative URL points at, if any
+    path = url.split("#", 1)[0].split("?", 1)[0].lstrip("/")
+    if not path or static_index is None:
+        return None
+    rel_path = os.path.normpath(path)
+    return static_index.path(rel_path) if rel_path in static_index else None
+
+def _signature(path, static_index):
+    # Content hash for sources and templates; static files, which may be
+    # large, are compared by size and mtime like sync_static does
+    if static_index is not None:
+        rel_path = static_index.rel_path(path)
+        if rel_path is not None:
+            return static_index.signature(rel_path)
+    try:
+        return hash_file(path)
+    except FileNotFoundError:
+        return None
+
+def _index_pages(search_index, pages, results, compress=False, profile=None):
+    with stage(profile, "search"):
+        for (_, dest_path, _), result in zip(pages, results):
+            search_index.update(dest_path, result["search"]["title"], result["search"]["terms"])
+        shards = search_index.write(compress)
+    if shards:
+        print(f"Updated {shards} search index shards")
+
+def _blog_posts(blog_dir, dir_path_content, dest_dir_path, pages, metadata, drafts=False):
+    # (source, URL, metadata) of the posts under blog_dir, queried from the
+    # metadata index, and the URL of the blog; the blog's own index.md, if
+    # any, is not a post
+    dests = {src_path: dest_path for src_path, dest_path, _ in pages}
+    blog_index = os.path.join(blog_dir, "index.md")
+    posts = [
+        (src_path, output_url(dests[src_path], dest_dir_path), meta)
+        for src_path, meta in metadata.pages(drafts, under=blog_dir)
+        if src_path in dests and src_path != blog_index
+    ]
+    blog_url = output_url(os.path.join(dest_dir_path, os.path.relpath(blog_dir, dir_path_content), "index.html"), dest_dir_path)
+    return posts, blog_url
+
+def _generate_listings(listings, dir_path_content, dest_dir_path, pages, metadata, layouts, config, assets, state=None, drafts=False, minify=False, compress=False, profile=None):
+    with stage(profile, "listings"):
+        posts, blog_url = _blog_posts(listings.blog_dir, dir_path_content, dest_dir_path, pages, metadata, drafts)
+        posts = [
+            {"url": url, "title": meta["title"], "date": meta.get("date"), "tags": meta.get("tags", [])}
+            for _, url, meta in posts
+        ]
+        template = layouts.template_for(os.path.join(listings.blog_dir, "index.md"))
+        salt = {
+            "config": config,
+            "template": [hash_file(path) for path in template.dependencies],
+            "assets": hash_bytes(json.dumps(assets, sort_keys=True).encode()) if assets else None,
+        }
+        reserved = {dest_path for _, dest_path, _ in pages}
+        return generate_listings(posts, blog_url, dest_dir_path, template, state, salt, listings.per_page, minify, compress, reserved)
+
+def _write_feeds(site_url, feed_dir, dir_path_content, dest_dir_path, pages, metadata, index, listing_dests=(), state=None, drafts=False, compress=False, profile=None):
+    # sitemap.xml of every page and listing and, with feed_dir, an Atom feed
+    # of its posts, streamed from the page list and metadata index. Posts
+    # without a date are stamped with their source's mtime.
+    with stage(profile, "feeds"):
+        entries = [
+            {"url": output_url(dest_path, dest_dir_path), "lastmod": w3c_date(metadata.get(src_path).get("date"))}
+            for src_path, dest_path, _ in pages
+        ]
+        entries += [{"url": output_url(dest_path, dest_dir_path)} for dest_path in listing_dests]
+        files = sitemap_files(entries, dest_dir_path, site_url)
+        if feed_dir is not None:
+            posts, blog_url = _blog_posts(feed_dir, dir_path_content, dest_dir_path, pages, metadata, drafts)
+            posts = [
+                {"url": url, "title": meta["title"], "updated": w3c_date(meta.get("date")) or timestamp(index.files[index.rel_path(src_path)]["mtime"])}
+                for src_path, url, meta in posts
+            ]
+            title = metadata.get(os.path.join(feed_dir, "index.md")).get("title") or os.path.basename(feed_dir).title()
+            author = urlparse(site_url).netloc or title
+            feed_path = os.path.normpath(os.path.join(dest_dir_path, os.path.relpath(feed_dir, dir_path_content), FEED_NAME))
+            files[feed_path] = lambda: feed_chunks(posts, site_url, title, blog_url, author)
+        return write_feeds(files, state, compress)
+
+def _check_links(link_checker, dest_dir_path, pages, layouts, basepath="/", static_index=None, assets=None, outputs=(), search=False, profile=None):
+    # Checks links against every page, other output and static file of the
+    # build. Template links are checked every build; there are few of them.
+    with stage(profile, "links"):
+        targets = {os.path.relpath(path, dest_dir_path).replace(os.sep, "/") for path in outputs}
+        targets.update(os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/") for _, dest_path, _ in pages)
+        if static_index is not None:
+            targets.update(rel_path.replace(os.sep, "/") for rel_path in static_index)
+        if assets:
+            targets.update(assets.values())
+        if search:
+            targets.update(f"{SEARCH_DIR}/{name}" for name in ("pages.json", "search.js"))
+        checked = link_checker.check(targets)
+        broken = link_checker.broken()
+        for template in layouts.templates():
+            broken.extend((template.path, url) for url in template.refs if resolve(url, "/", targets) is None)
+    if checked:
+        print(f"Checked links on {checked} pages")
+    report_broken(broken, basepath)
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/", manifest_path=None, jobs=1, profile=None, options=None, static_dir=None, static_index=None, assets=None, drafts=False, listings=None, feeds=None):
+    # With manifest_path the next build regenerates only what changed.
+    # options, listings and feeds are the RenderOptions, ListingOptions and
+    # FeedOptions of the build; listing pages and feeds are written only when
+    # given. assets maps static files to their fingerprinted names and draft
+    # pages are left out unless drafts is set.
+    if options is None:
+        options = RenderOptions()
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    layouts = LayoutResolver(template_path, dir_path_content, basepath, assets)
+    with stage(profile, "scan"):
+        index = FileIndex.scan(dir_path_content, load_index(manifest, dir_path_content))
+        if static_index is None and static_dir is not None and os.path.isdir(static_dir):
+            static_index = FileIndex.scan(static_dir, load_index(manifest, static_dir))
+        sources = find_pages(dir_path_content, dest_dir_path, index)
+        # Front matter is read again only for sources whose hash changed
+        metadata = MetadataIndex.from_dict(manifest.get("metadata", {}))
+        metadata.refresh([src_path for src_path, _ in sources], index if manifest_path else None)
+        pages = [
+            (src_path, dest_path, layouts.template_for(src_path, metadata.get(src_path).get("layout")))
+            for src_path, dest_path in sources
+            if drafts or not metadata.get(src_path).get("draft")
+        ]
+    old_pages = manifest.get("pages", {})
+    old_hashes = manifest.get("hashes", {})
+    config = {"version": GENERATOR_VERSION, "basepath": basepath}
+    if assets is not None:
+        config["fingerprint"] = True
+    if options.minify:
+        config["minify"] = True
+    if options.compress:
+        config["compress"] = True
+    # A config change invalidates every output; otherwise only the outputs
+    # depending on a changed input are rebuilt
+    if manifest.get("inputs") == config:
+        graph = DependencyGraph.from_dict(manifest.get("graph", {}))
+    else:
+        graph = DependencyGraph()
+    search_index = SearchIndex.load(dest_dir_path, manifest.get("search"), options.search_positions) if options.search else None
+    link_checker = LinkChecker(manifest.get("links")) if options.links else None
+
+    with stage(profile, "scan"):
+        hashes = {}
+        # Without a manifest nothing is compared or kept, so nothing is hashed
+        if manifest_path:
+            # Sources whose size and mtime match the stored index keep their hash
+            for src_path, _, _ in pages:
+                hashes[src_path] = index.hash(index.rel_path(src_path))
+            for template in layouts.templates():
+                for path in template.dependencies:
+                    hashes[path] = hash_file(path)
+            for path in graph.inputs():
+                if path not in hashes:
+                    hashes[path] = _signature(path, static_index)
+        changed = {
+            path for path in hashes.keys() | old_hashes.keys()
+            if hashes.get(path) != old_hashes.get(path)
+        }
+        dirty = graph.affected(changed)
+        # A page whose layout now resolves to different files, such as a newly
+        # added template.html, is rebuilt too
+        stale = [
+            (src_path, dest_path, template) for src_path, dest_path, template in pages
+            if dest_path in dirty
+            or dest_path not in graph
+            or not graph.dependencies(dest_path).issuperset(template.dependencies)
+            or not os.path.exists(dest_path)
+            or (search_index is not None and dest_path not in search_index)
+            or (link_checker is not None and src_path not in link_checker)
+        ]
+
+    new_pages = {src_path: {"dest": dest_path} for src_path, dest_path, _ in pages}
+    new_dests = {dest_path for _, dest_path, _ in pages}
+    for src_path, entry in old_pages.items():
+        if entry["dest"] not in new_dests:
+            print(f"Removing stale page {entry['dest']}")
+            remove_variants(entry["dest"])
+            remove_output(entry["dest"], dest_dir_path)
+            graph.remove_output(entry["dest"])
+            if search_index is not None:
+                search_index.remove(entry["dest"])
+            if link_checker is not None:
+                link_checker.remove(src_path)
+
+    if manifest.get("inputs", {}).get("compress") and not options.compress:
+        # Left over from builds with compression on
+        for _, dest_path, _ in stale:
+            remove_variants(dest_path)
+        if search_index is not None:
+            search_index.remove_variants()
+    results = generate_pages(stale, jobs, profile, options)
+    if search_index is not None:
+        _index_pages(search_index, stale, results, options.compress, profile)
+        manifest["search"] = search_index.to_dict()
+    elif "search" in manifest:
+        remove_search_index(dest_dir_path)
+        del manifest["search"]
+
+    if listings is not None:
+        manifest["listings"] = _generate_listings(
+            listings, dir_path_content, dest_dir_path, pages, metadata, layouts, config, assets,
+            manifest.get("listings"), drafts, options.minify, options.compress, profile)
+    elif "listings" in manifest:
+        remove_listings(manifest.pop("listings").keys() - new_dests, dest_dir_path)
+    if feeds is not None:
+        site_url = feeds.site_url.rstrip("/") + basepath.rstrip("/")
+        manifest["feeds"] = _write_feeds(
+            site_url, feeds.feed_dir, dir_path_content, dest_dir_path, pages, metadata, index,
+            manifest.get("listings", {}), manifest.get("feeds"), drafts, options.compress, profile)
+    elif "feeds" in manifest:
+        for path in sorted(manifest.pop("feeds")):
+            remove_feed(path)
+    if link_checker is not None:
+        for (src_path, dest_path, _), result in zip(stale, results):
+            link_checker.update(src_path, output_url(dest_path, dest_dir_path), result["links"])
+        outputs = list(manifest.get("listings", {})) + list(manifest.get("feeds", {}))
+        _check_links(link_checker, dest_dir_path, pages, layouts, basepath, static_index, assets, outputs, options.search, profile)
+        manifest["links"] = link_checker.to_dict()
+    elif "links" in manifest:
+        del manifest["links"]
+
+    skipped = len(pages) - len(stale)
+    if skipped:
+        print(f"Skipped {skipped} unchanged pages")
+    if not manifest_path:
+        return
+
+    template_inputs = {}
+    for template in layouts.templates():
+        inputs = list(template.dependencies)
+        for url in template.refs:
+            static_file = _static_file(url, static_index)
+            if static_file is not None:
+                inputs.append(static_file)
+        template_inputs[template.path] = inputs
+    for (src_path, dest_path, template), result in zip(stale, results):
+        inputs = [src_path] + template_inputs[template.path]
+        for url in result["refs"]:
+            static_file = _static_file(url, static_index)
+            if static_file is not None:
+                inputs.append(static_file)
+        graph.set_dependencies(dest_path, inputs)
+
+    inputs = graph.inputs()
+    for path in inputs - hashes.keys():
+        hashes[path] = _signature(path, static_index)
+    manifest["inputs"] = config
+    manifest["pages"] = new_pages
+    manifest["graph"] = graph.to_dict()
+    manifest["hashes"] = {path: hashes[path] for path in inputs}
+    manifest["metadata"] = metadata.to_dict()
+    # Every template, partial and layout used, for --watch; they may live
+    # outside dir_path_content
+    manifest["templates"] = sorted({path for template in layouts.templates() for path in template.dependencies})
+    store_index(manifest, index)
+    if static_index is not None:
+        store_index(manifest, static_index)
+    save_manifest(manifest, manifest_path)
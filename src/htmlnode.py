@@ -1,6 +1,9 @@
 from textnode import TextNode, TextType
 
 class HTMLNode():
+    # Slotted to keep large trees compact; subclasses add no attributes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,59 +11,69 @@ class HTMLNode():
         self.props = props
 
     def to_html(self):
+        chunks = []
+        self.write_html(chunks.append)
+        return "".join(chunks)
+
+    def write_html(self, write):
+        # Streams the HTML as chunks through write, e.g. list.append or a
+        # file's write method, so large trees are never concatenated in place
         raise NotImplementedError
     
     def props_to_html(self):
         if self.props is None:
             return ""
-        result = ""
-        for key, value in self.props.items():
-            result += f' {key}="{value}"'
-        return result
+        return "".join(f' {key}="{value}"' for key, value in self.props.items())
     
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def write_html(self, write):
         if self.value is None:
             raise ValueError
         if self.tag is None:
-            return self.value
+            write(self.value)
         else:
-            return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            write(f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>")
         
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def write_html(self, write):
         if self.tag is None:
             raise ValueError
         if self.children is None:
             raise ValueError("no children")
-        html_string = f"<{self.tag}{self.props_to_html()}>"
+        write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            html_string += child.to_html()
-        html_string += f"</{self.tag}>"
-        return html_string
+            child.write_html(write)
+        write(f"</{self.tag}>")
     
+# TextType -> function building the LeafNode for a TextNode of that type
+TEXT_HANDLERS = {
+    TextType.PLAIN_TEXT: lambda node: LeafNode(None, node.text),
+    TextType.BOLD_TEXT: lambda node: LeafNode("b", node.text),
+    TextType.ITALIC_TEXT: lambda node: LeafNode("i", node.text),
+    TextType.CODE_TEXT: lambda node: LeafNode("code", node.text),
+    TextType.LINK: lambda node: LeafNode("a", node.text, {"href": node.url}),
+    TextType.IMAGE: lambda node: LeafNode("img", "", {"src": node.url, "alt": node.text}),
+}
+
+def register_text_type(text_type, handler):
+    TEXT_HANDLERS[text_type] = handler
+
 def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.PLAIN_TEXT:
-        return LeafNode(None, text_node.text)
-    elif text_node.text_type == TextType.BOLD_TEXT:
-        return LeafNode("b", text_node.text)
-    elif text_node.text_type == TextType.ITALIC_TEXT:
-        return LeafNode("i", text_node.text)
-    elif text_node.text_type == TextType.CODE_TEXT:
-        return LeafNode("code", text_node.text)
-    elif text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    else:
+    handler = TEXT_HANDLERS.get(text_node.text_type)
+    if handler is None:
         raise ValueError("Invalid Text Type")
+    return handler(text_node)
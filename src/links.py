@@ -0,0 +1,127 @@
+import re
+from urllib.parse import unquote, urljoin, urlsplit
+from depgraph import DependencyGraph
+
+# A body fragment renders every LINK and IMAGE TextNode as an href or src
+# attribute, so its URLs are taken from there rather than by parsing the
+# Markdown again, which keeps fragment cache hits cheap. Code is skipped.
+_URL_PATTERN = re.compile(r'(?:href|src)="([^"]*)"')
+_CODE_PATTERN = re.compile(r"<(pre|code)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+
+def is_internal(url):
+    # Root-relative or relative URLs with a path; "#top" and
+    # "https://..." or "mailto:..." are not checked
+    parts = urlsplit(url)
+    return not parts.scheme and not parts.netloc and bool(parts.path)
+
+def page_links(html):
+    # Internal URLs linked from a body fragment, in order, once each
+    html = _CODE_PATTERN.sub("", html)
+    return list(dict.fromkeys(url for url in _URL_PATTERN.findall(html) if is_internal(url)))
+
+def link_target(url, page_url):
+    # Path, relative to the output root, of what url points at from the
+    # page served at page_url: ("../tom", "/blog/majesty/") -> "blog/tom"
+    return unquote(urlsplit(urljoin(page_url, url)).path).lstrip("/")
+
+def target_candidates(path):
+    # Outputs that serve path; "blog/tom" is redirected to "blog/tom/"
+    if not path or path.endswith("/"):
+        return [path + "index.html"]
+    return [path, path + "/index.html"]
+
+def resolve(url, page_url, targets):
+    for candidate in target_candidates(link_target(url, page_url)):
+        if candidate in targets:
+            return candidate
+    return None
+
+def link_locations(src_path, url):
+    # "path:line" of every line of a Markdown source or template linking
+    # to url
+    needles = (f"]({url})", f'"{url}"')
+    try:
+        with open(src_path, 'r') as f:
+            lines = [number for number, line in enumerate(f, 1) if any(needle in line for needle in needles)]
+    except OSError:
+        lines = []
+    return [f"{src_path}:{number}" for number in lines] or [src_path]
+
+class LinkChecker:
+    # Internal links of every page, keyed by source, and the set of targets
+    # (output paths relative to the output root) they were checked against;
+    # persisted in the build manifest. A reverse index from target to the
+    # pages linking to it means a build rechecks only the pages whose links
+    # changed and those linking to targets that appeared or disappeared.
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.pages = state.get("pages", {})
+        self.targets = set(state.get("targets", []))
+        self.graph = DependencyGraph()
+        for src_path, page in self.pages.items():
+            self._index(src_path, page)
+        self._dirty = set()
+
+    def _index(self, src_path, page):
+        candidates = []
+        for url in page["links"]:
+            candidates.extend(target_candidates(link_target(url, page["url"])))
+        self.graph.set_dependencies(src_path, candidates)
+
+    def __contains__(self, src_path):
+        return src_path in self.pages
+
+    def update(self, src_path, page_url, links):
+        page = {"url": page_url, "links": links}
+        self.pages[src_path] = page
+        self._index(src_path, page)
+        self._dirty.add(src_path)
+
+    def remove(self, src_path):
+        self.pages.pop(src_path, None)
+        self.graph.remove_output(src_path)
+
+    def check(self, targets):
+        # Rechecks what targets, the outputs of this build, may have broken
+        # or fixed; returns how many pages were checked
+        recheck = self._dirty | self.graph.affected(targets ^ self.targets)
+        for src_path in recheck:
+            page = self.pages.get(src_path)
+            if page is None:
+                continue
+            broken = [url for url in page["links"] if resolve(url, page["url"], targets) is None]
+            if broken:
+                page["broken"] = broken
+            else:
+                page.pop("broken", None)
+        self.targets = set(targets)
+        self._dirty = set()
+        return len(recheck)
+
+    def broken(self):
+        # (source, url) of every broken link, checked or not this build
+        return [
+            (src_path, url)
+            for src_path in sorted(self.pages)
+            for url in self.pages[src_path].get("broken", ())
+        ]
+
+    def to_dict(self):
+        return {"pages": self.pages, "targets": sorted(self.targets)}
+
+    def __repr__(self):
+        return f"LinkChecker({len(self.pages)} pages, {len(self.targets)} targets)"
+
+def report_broken(broken, basepath="/"):
+    # Prints one line per broken link with its source location; links that
+    # already include basepath get a hint, since it is added on rendering
+    prefix = basepath.strip("/") + "/"
+    for src_path, url in broken:
+        hint = ""
+        if prefix != "/" and url.lstrip("/").startswith(prefix):
+            hint = f" (drop the {basepath} prefix; it is added when rendering)"
+        for location in link_locations(src_path, url):
+            print(f"{location}: broken link to {url}{hint}")
+    if broken:
+        print(f"Found {len(broken)} broken links")
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import re
+from htmlnode import LeafNode, ParentNode
+from manifest import remove_output
+from postprocess import minify_html, remove_variants
+from writer import write_output
+
+DEFAULT_PER_PAGE = 10
+
+_SLUG_PATTERN = re.compile(r"[^a-z0-9]+")
+_MONTH_PATTERN = re.compile(r"(\d{4})-(\d{2})")
+
+def slugify(text):
+    return _SLUG_PATTERN.sub("-", text.lower()).strip("-")
+
+def post_month(date):
+    # "2024-03-01" -> "2024/03"; None for a missing or malformed date
+    match = _MONTH_PATTERN.match(date or "")
+    return f"{match.group(1)}/{match.group(2)}" if match else None
+
+def sort_posts(posts):
+    # Newest first, then the undated posts by URL
+    dated = sorted((post for post in posts if post["date"]), key=lambda post: (post["date"], post["url"]), reverse=True)
+    undated = sorted((post for post in posts if not post["date"]), key=lambda post: post["url"])
+    return dated + undated
+
+def _page_url(base_url, number):
+    return base_url if number == 1 else f"{base_url}page/{number}/"
+
+def plan_listings(posts, blog_url, per_page=DEFAULT_PER_PAGE):
+    # Maps the URL of every listing page to its contents: the blog index at
+    # blog_url, one listing per tag under tags/ and per month under archive/,
+    # each split into pages of per_page posts. posts hold the "url", "title",
+    # "date" and "tags" of every post.
+    posts = sort_posts(posts)
+    groups = [("Blog", blog_url, posts)]
+    tags = {}
+    months = {}
+    for post in posts:
+        for tag in post["tags"]:
+            slug = slugify(tag)
+            if slug:
+                tags.setdefault(slug, (tag, []))[1].append(post)
+        month = post_month(post["date"])
+        if month is not None:
+            months.setdefault(month, []).append(post)
+    for slug in sorted(tags):
+        tag, members = tags[slug]
+        groups.append((f"Posts tagged {tag}", f"{blog_url}tags/{slug}/", members))
+    for month in sorted(months, reverse=True):
+        groups.append((f"Posts from {month.replace('/', '-')}", f"{blog_url}archive/{month}/", months[month]))
+
+    listings = {}
+    for title, base_url, members in groups:
+        count = max(1, -(-len(members) // per_page))
+        for number in range(1, count + 1):
+            listings[_page_url(base_url, number)] = {
+                "title": title if number == 1 else f"{title} (page {number})",
+                "posts": members[(number - 1) * per_page:number * per_page],
+                "newer": _page_url(base_url, number - 1) if number > 1 else None,
+                "older": _page_url(base_url, number + 1) if number < count else None,
+            }
+    return listings
+
+def listing_html(listing):
+    children = [LeafNode("h1", listing["title"])]
+    items = []
+    for post in listing["posts"]:
+        parts = [LeafNode("a", post["title"] or post["url"], {"href": post["url"]})]
+        if post["date"]:
+            parts.append(LeafNode(None, " "))
+            parts.append(LeafNode("time", post["date"], {"datetime": post["date"]}))
+        items.append(ParentNode("li", parts))
+    if items:
+        children.append(ParentNode("ul", items))
+    nav = []
+    if listing["newer"]:
+        nav.append(LeafNode("a", "Newer posts", {"href": listing["newer"], "rel": "prev"}))
+    if listing["older"]:
+        nav.append(LeafNode("a", "Older posts", {"href": listing["older"], "rel": "next"}))
+    if nav:
+        children.append(ParentNode("nav", nav))
+    return ParentNode("div", children).to_html()
+
+class ListingOptions:
+    # Listing pages for the posts under blog_dir, a directory of the content
+    # tree, split into pages of per_page posts
+
+    def __init__(self, blog_dir, per_page=DEFAULT_PER_PAGE):
+        self.blog_dir = blog_dir
+        self.per_page = per_page
+
+    def __repr__(self):
+        return f"ListingOptions({self.blog_dir}, {self.per_page})"
+
+def listing_dest(url, dest_dir):
+    return os.path.join(dest_dir, *url.strip("/").split("/"), "index.html")
+
+def _signature(listing, salt):
+    data = json.dumps([salt, listing], sort_keys=True).encode()
+    return hashlib.sha256(data).hexdigest()
+
+def generate_listings(posts, blog_url, dest_dir, template, state=None, salt="", per_page=DEFAULT_PER_PAGE, minify=False, compress=False, reserved=()):
+    # Writes the listing pages of plan_listings through template and returns
+    # the new state, {output path: signature}, to pass back next build. The
+    # signature covers the listing's posts and salt, which should change
+    # whenever the template or build options do, so a listing is rendered
+    # again only when the set or the metadata of its posts changes. Outputs
+    # in reserved belong to content pages and are never overwritten.
+    state = state or {}
+    new_state = {}
+    generated = 0
+    for url, listing in plan_listings(posts, blog_url, per_page).items():
+        dest_path = listing_dest(url, dest_dir)
+        if dest_path in reserved:
+            print(f"Skipping listing {url}: {dest_path} is a content page")
+            continue
+        signature = _signature(listing, salt)
+        new_state[dest_path] = signature
+        if state.get(dest_path) == signature and os.path.exists(dest_path):
+            continue
+        html = template.render(listing["title"], listing_html(listing))
+        if minify:
+            html = minify_html(html)
+        write_output(dest_path, html.encode(), compress)
+        if not compress:
+            remove_variants(dest_path)
+        generated += 1
+    remove_listings(state.keys() - new_state.keys() - set(reserved), dest_dir)
+    skipped = len(new_state) - generated
+    if generated:
+        print(f"Generated {generated} listing pages")
+    if skipped:
+        print(f"Skipped {skipped} unchanged listing pages")
+    return new_state
+
+def remove_listings(dest_paths, dest_dir):
+    for dest_path in sorted(dest_paths):
+        print(f"Removing stale listing {dest_path}")
+        remove_variants(dest_path)
+        remove_output(dest_path, dest_dir)
@@ -1,21 +1,263 @@
-import sys
-from copy_static import copy_static_to_public
-from generate_page import generate_pages_recursive
+import argparse
+import cProfile
+import os
+import shutil
+import time
+from cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, FragmentCache
+from copy_static import sync_static
+from feeds import FeedOptions
+from file_index import scan_index
+from fingerprint import build_asset_manifest
+from generate_page import RenderOptions, generate_pages_recursive
+from listings import DEFAULT_PER_PAGE, ListingOptions
+from manifest import load_manifest
+from profiler import BuildProfile, stage
+from watch import watch_and_serve
 
-def main():
-    # Get basepath from CLI argument, default to "/"
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+MANIFEST_PATH = ".build/manifest.json"
+# Sources that always trigger a rebuild; templates outside content/, such
+# as {{ include }} partials and front matter layouts, are added from the
+# manifest
+WATCH_ROOTS = ["content", "static", "template.html"]
 
-    copy_static_to_public("static", "docs")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    # Get basepath from CLI argument, default to "/"
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes for page generation (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--compare",
+        choices=("mtime", "hash"),
+        default="mtime",
+        help="how static files are compared with their copies in docs/",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="also copy assets to content-hashed names and link pages to those",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="minify generated HTML and copied CSS",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed .gz (and .br with brotli installed) siblings of text outputs",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="build a sharded search index and client script into docs/search/",
+    )
+    parser.add_argument(
+        "--search-positions",
+        action="store_true",
+        help="also record where each word occurs on a page in the search index (implies --search)",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also build pages marked draft: true in their front matter",
+    )
+    parser.add_argument(
+        "--listings",
+        action="store_true",
+        help="generate paginated index, tag and archive pages for content/blog/",
+    )
+    parser.add_argument(
+        "--per-page",
+        type=int,
+        default=DEFAULT_PER_PAGE,
+        help="posts per listing page",
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="scheme and host the site is served from; writes sitemap.xml and an Atom feed of content/blog/",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report internal links to missing pages or static files, with their source lines",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete docs/ and rebuild everything from scratch",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve docs/ with live reload and rebuild when sources change",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="port for the --watch development server",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print per-stage timings, counters and the slowest pages",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="write the build profile as JSON to PATH (implies --profile)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="run the build under cProfile and dump the stats to PATH",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="directory of the parsed-fragment cache",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        metavar="MB",
+        help="size cap of the fragment cache; least recently used entries are evicted",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse Markdown instead of reusing cached fragments",
+    )
+    parser.add_argument(
+        "--clean-cache",
+        action="store_true",
+        help="delete the fragment cache and exit",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive number")
+    if args.per_page < 1:
+        parser.error("--per-page must be a positive number")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
 
-    generate_pages_recursive(
-        "content",
-        "template.html",
-        "docs",
-        basepath
+def _touches(changed, *roots):
+    return any(
+        path == root or path.startswith(root + os.sep)
+        for path in changed
+        for root in roots
     )
 
+def template_paths(manifest_path=MANIFEST_PATH):
+    # Templates, partials and layouts the last build rendered with
+    return load_manifest(manifest_path).get("templates", [])
+
+def watch_paths(manifest_path=MANIFEST_PATH):
+    extra = [path for path in template_paths(manifest_path) if not _touches([path], *WATCH_ROOTS)]
+    return WATCH_ROOTS + extra
+
+def build(args, changed=None, profile=None):
+    # changed limits the rebuild to the stages affected by those paths
+    sync = changed is None or _touches(changed, "static")
+    render = changed is None or _touches(changed, "content", "template.html", *template_paths())
+    # Fingerprinted names and link targets follow static/, so pages must be
+    # rendered again when it changes
+    if sync and (args.fingerprint or args.check_links):
+        render = True
+    # static/ is walked once and the index shared by the copier and renderer
+    static_index = None
+    if sync or render:
+        with stage(profile, "scan"):
+            static_index = scan_index("static", MANIFEST_PATH)
+    assets = None
+    if args.fingerprint and static_index is not None:
+        assets = build_asset_manifest(static_index)
+
+    if sync:
+        # Keep existing output so unchanged pages and assets are not rewritten
+        with stage(profile, "static"):
+            sync_static(
+                "static",
+                "docs",
+                manifest_path=MANIFEST_PATH,
+                compare=args.compare,
+                index=static_index,
+                assets=assets,
+                minify=args.minify,
+                compress=args.compress
+            )
+
+    if render:
+        generate_pages_recursive(
+            "content",
+            "template.html",
+            "docs",
+            args.basepath,
+            manifest_path=MANIFEST_PATH,
+            jobs=args.jobs,
+            profile=profile,
+            options=RenderOptions(
+                cache=None if args.no_cache else FragmentCache(args.cache_dir, args.cache_size * 1024 * 1024),
+                minify=args.minify,
+                compress=args.compress,
+                search=args.search or args.search_positions,
+                links=args.check_links,
+                search_positions=args.search_positions
+            ),
+            static_dir="static",
+            static_index=static_index,
+            assets=assets,
+            drafts=args.drafts,
+            listings=ListingOptions("content/blog", args.per_page) if args.listings else None,
+            feeds=FeedOptions(args.site_url, "content/blog") if args.site_url else None
+        )
+
+def profiled_build(args):
+    profile = BuildProfile()
+    start = time.perf_counter()
+    if args.cprofile:
+        profiler = cProfile.Profile()
+        profiler.runcall(build, args, profile=profile)
+        profiler.dump_stats(args.cprofile)
+    else:
+        build(args, profile=profile)
+    profile.wall = time.perf_counter() - start
+    print(profile.report())
+    if args.profile_json:
+        profile.write_json(args.profile_json)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.clean_cache:
+        FragmentCache(args.cache_dir).clear()
+        print(f"Deleted fragment cache {args.cache_dir}")
+        return
+
+    if args.clean and os.path.exists("docs"):
+        print("Deleting docs directory...")
+        shutil.rmtree("docs")
+
+    if args.profile or args.profile_json or args.cprofile:
+        profiled_build(args)
+    else:
+        build(args)
+
+    if args.watch:
+        watch_and_serve(
+            lambda changed: build(args, changed),
+            watch_paths,
+            "docs",
+            args.port
+        )
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+
+# Bump whenever a change to the generator alters the HTML it produces, so
+# that every page is rebuilt on the next run.
+GENERATOR_VERSION = "1"
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    return manifest
+
+def save_manifest(manifest, path):
+    manifest_dir = os.path.dirname(path)
+    if manifest_dir:
+        os.makedirs(manifest_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        # Encoded in one go without indentation, the only way json uses its C
+        # encoder; json.dump falls back to a pure Python one several times
+        # slower on large sites
+        f.write(json.dumps(manifest, separators=(",", ":"), sort_keys=True))
+    os.replace(tmp_path, path)
+
+def output_url(path, dest_dir):
+    # Root-relative URL an output is served at: "docs/blog/tom/index.html"
+    # -> "/blog/tom/"
+    rel_path = os.path.relpath(path, dest_dir).replace(os.sep, "/")
+    if rel_path == "index.html" or rel_path.endswith("/index.html"):
+        rel_path = rel_path[:-len("index.html")]
+    return "/" + rel_path
+
+def remove_output(path, stop_dir):
+    if os.path.exists(path):
+        os.remove(path)
+    # Prune directories left empty by the removal, but never stop_dir itself
+    stop_dir = os.path.abspath(stop_dir)
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent != stop_dir and parent.startswith(stop_dir + os.sep):
+        if os.listdir(parent):
+            break
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
@@ -1,39 +1,33 @@
-from htmlnode import ParentNode, LeafNode, text_node_to_html_node
-from split_delim import markdown_to_blocks, block_to_block_type, BlockType, text_to_textnodes
+from htmlnode import ParentNode, LeafNode, text_node_to_html_node, register_text_type
+from split_delim import (
+    markdown_to_blocks, iter_blocks, lex_block, BlockType, text_to_textnodes,
+    register_block_lexer, register_inline_delimiter)
 
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+def text_to_children(text, profile=None):
+    if profile is None:
+        text_nodes = text_to_textnodes(text)
+    else:
+        with profile.stage("inline"):
+            text_nodes = text_to_textnodes(text)
+        profile.count("inline_nodes", len(text_nodes))
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
         children.append(html_node)
     return children
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    text = " ".join(lines)
-    children = text_to_children(text)
-    return ParentNode("p", children)
+def paragraph_to_html_node(block, profile=None):
+    return _paragraph(block.split("\n"), profile)
 
-def heading_to_html_node(block):
-    count = 0
-    for char in block:
-        if char == "#":
-            count += 1
-        else:
-            break
-    text = block[count + 1:]
-    tag = f"h{count}"
-    children = text_to_children(text)
-    return ParentNode(tag, children)
-
-def code_to_html_node(block):
+def heading_to_html_node(block, profile=None):
+    count = len(block) - len(block.lstrip("#"))
+    return _heading((count, block[count + 1:]), profile)
+
+def code_to_html_node(block, profile=None):
     # Remove ``` from start and end, strip leading newline only
-    text = block[3:-3].lstrip("\n")
-    code_node = LeafNode("code", text)
-    return ParentNode("pre", [code_node])
+    return _code(block[3:-3].lstrip("\n"))
 
-def quote_to_html_node(block):
+def quote_to_html_node(block, profile=None):
     lines = block.split("\n")
     stripped_lines = []
     for line in lines:
@@ -41,46 +35,92 @@ def quote_to_html_node(block):
             stripped_lines.append(line[2:])
         elif line.startswith(">"):
             stripped_lines.append(line[1:])
-    text = "\n".join(stripped_lines)
-    children = text_to_children(text)
-    return ParentNode("blockquote", children)
+    return _quote(stripped_lines, profile)
 
-def unordered_list_to_html_node(block):
-    lines = block.split("\n")
-    li_nodes = []
-    for line in lines:
-        text = line[2:]
-        children = text_to_children(text)
-        li_node = ParentNode("li", children)
-        li_nodes.append(li_node)
-    return ParentNode("ul", li_nodes)
+def unordered_list_to_html_node(block, profile=None):
+    return _list("ul", [line[2:] for line in block.split("\n")], profile)
 
-def ordered_list_to_html_node(block):
-    lines = block.split("\n")
-    li_nodes = []
-    for i, line in enumerate(lines):
-        space_index = line.index(". ") + 2
-        text = line[space_index:]
-        children = text_to_children(text)
-        li_node = ParentNode("li", children)
-        li_nodes.append(li_node)
-    return ParentNode("ol", li_nodes)
-
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            children.append(paragraph_to_html_node(block))
-        elif block_type == BlockType.HEADING:
-            children.append(heading_to_html_node(block))
-        elif block_type == BlockType.CODE:
-            children.append(code_to_html_node(block))
-        elif block_type == BlockType.QUOTE:
-            children.append(quote_to_html_node(block))
-        elif block_type == BlockType.UNORDERED_LIST:
-            children.append(unordered_list_to_html_node(block))
-        elif block_type == BlockType.ORDERED_LIST:
-            children.append(ordered_list_to_html_node(block))
-    return ParentNode("div", children)
\ No newline at end of file
+def ordered_list_to_html_node(block, profile=None):
+    items = [line[line.index(". ") + 2:] for line in block.split("\n")]
+    return _list("ol", items, profile)
+
+# Builders over the pieces lex_block hands back, so a block's text is not
+# split again after classification
+
+def _paragraph(lines, profile=None):
+    return ParentNode("p", text_to_children(" ".join(lines), profile))
+
+def _heading(token, profile=None):
+    level, text = token
+    return ParentNode(f"h{level}", text_to_children(text, profile))
+
+def _code(text, profile=None):
+    return ParentNode("pre", [LeafNode("code", text)])
+
+def _quote(lines, profile=None):
+    return ParentNode("blockquote", text_to_children("\n".join(lines), profile))
+
+def _list(tag, items, profile=None):
+    return ParentNode(tag, [ParentNode("li", text_to_children(item, profile)) for item in items])
+
+def _unordered_list(items, profile=None):
+    return _list("ul", items, profile)
+
+def _ordered_list(items, profile=None):
+    return _list("ol", items, profile)
+
+# BlockType -> builder taking the token lex_block returned for the block
+BLOCK_BUILDERS = {
+    BlockType.PARAGRAPH: _paragraph,
+    BlockType.HEADING: _heading,
+    BlockType.CODE: _code,
+    BlockType.QUOTE: _quote,
+    BlockType.UNORDERED_LIST: _unordered_list,
+    BlockType.ORDERED_LIST: _ordered_list,
+}
+
+def register_block_type(block_type, lex, build):
+    # lex(block) returns (block_type, token) for blocks of the new type and
+    # None otherwise; build(token, profile) returns its HTMLNode. Registered
+    # types are tried before the built-in ones, so they can also take over
+    # blocks that would otherwise be paragraphs. Register at import time so
+    # build worker processes see the same types.
+    register_block_lexer(lex)
+    BLOCK_BUILDERS[block_type] = build
+
+def register_inline_type(delimiter, text_type, build):
+    # Text wrapped in delimiter becomes a TextNode of text_type, converted
+    # by build(text_node) into a LeafNode
+    register_inline_delimiter(delimiter, text_type)
+    register_text_type(text_type, build)
+
+def markdown_to_html_node(markdown, profile=None):
+    if profile is None:
+        blocks = markdown_to_blocks(markdown)
+    else:
+        with profile.stage("blocks"):
+            blocks = markdown_to_blocks(markdown)
+        profile.count("blocks", len(blocks))
+        with profile.stage("parse"):
+            return _blocks_to_html_node(blocks, profile)
+    return _blocks_to_html_node(blocks)
+
+def block_to_html_node(block, profile=None):
+    block_type, token = lex_block(block)
+    return BLOCK_BUILDERS[block_type](token, profile)
+
+def _blocks_to_html_node(blocks, profile=None):
+    children = [block_to_html_node(block, profile) for block in blocks]
+    return ParentNode("div", children)
+
+def write_markdown_html(lines, write):
+    # Streaming markdown_to_html_node(...).write_html(write): blocks are read
+    # from lines, converted and written one at a time. Returns the number of
+    # blocks written.
+    count = 0
+    write("<div>")
+    for block in iter_blocks(lines):
+        block_to_html_node(block).write_html(write)
+        count += 1
+    write("</div>")
+    return count
\ No newline at end of file
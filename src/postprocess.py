@@ -0,0 +1,103 @@
+import gzip
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Outputs that get precompressed siblings; images and fonts are already
+# compressed
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".svg", ".txt", ".xml", ".json")
+MINIFIABLE_EXTENSIONS = (".html", ".css")
+
+def _gzip(data):
+    # mtime=0 keeps the bytes, and so the unchanged-output check, stable
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+# Suffix -> compressor for every precompressed variant written
+COMPRESSORS = {".gz": _gzip}
+if brotli is not None:
+    COMPRESSORS[".br"] = brotli.compress
+# Every suffix a variant may have been written with, for cleaning up
+VARIANT_SUFFIXES = (".gz", ".br")
+
+# Elements whose contents are kept verbatim
+_PRESERVE_PATTERN = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+# Keeps conditional comments such as <!--[if IE]>
+_COMMENT_PATTERN = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_CSS_TOKEN_PATTERN = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""  # strings, kept as they are
+    r"|(/\*.*?\*/)"                              # comments
+    r"|\s*;?\s*(\})\s*"                          # "; }" closes a rule
+    r"|\s*([{;,>])\s*"                           # punctuation needs no spaces
+    r"|(:)\s+"                                   # "color: red"; never " :"
+    r"|\s+",
+    re.S,
+)
+
+def _minify_html_text(text):
+    text = _COMMENT_PATTERN.sub("", text)
+    return _WHITESPACE_PATTERN.sub(" ", text)
+
+def minify_html(html):
+    # Drops comments and collapses runs of whitespace into one space, which
+    # renders the same outside pre, textarea, script and style elements
+    chunks = []
+    pos = 0
+    for match in _PRESERVE_PATTERN.finditer(html):
+        chunks.append(_minify_html_text(html[pos:match.start()]))
+        chunks.append(match.group(0))
+        pos = match.end()
+    chunks.append(_minify_html_text(html[pos:]))
+    return "".join(chunks).strip()
+
+def _css_token(match):
+    string, comment, close, punctuation, colon = match.groups()
+    if string is not None:
+        return string
+    if comment is not None:
+        return " "
+    return close or punctuation or colon or " "
+
+def minify_css(css):
+    # Two passes: the first turns comments into spaces that the second
+    # folds into the punctuation around them
+    css = _CSS_TOKEN_PATTERN.sub(_css_token, css)
+    return _CSS_TOKEN_PATTERN.sub(_css_token, css).strip()
+
+def minify_output(path, data):
+    # data minified according to the extension of path, as bytes
+    if path.endswith(".html"):
+        return minify_html(data.decode()).encode()
+    if path.endswith(".css"):
+        return minify_css(data.decode()).encode()
+    return data
+
+def is_compressible(path):
+    return path.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+
+def compressed_variants(path, data):
+    # (sibling path, bytes) for every precompressed variant of data
+    return [(path + suffix, compress(data)) for suffix, compress in COMPRESSORS.items()]
+
+def compress_file(path):
+    # Writes the compressed siblings of a file too large to hold in memory
+    with open(path, 'rb') as src, open(path + ".gz", 'wb') as raw:
+        with gzip.GzipFile("", 'wb', 9, raw, mtime=0) as out:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                out.write(chunk)
+    if brotli is not None:
+        compressor = brotli.Compressor()
+        with open(path, 'rb') as src, open(path + ".br", 'wb') as out:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                out.write(compressor.process(chunk))
+            out.write(compressor.finish())
+
+def remove_variants(path):
+    for suffix in VARIANT_SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
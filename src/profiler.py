@@ -0,0 +1,89 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Stages in pipeline order, used to order the report
+STAGES = ("static", "scan", "read", "cache", "blocks", "parse", "inline", "to_html", "template", "stream", "write", "search", "listings", "feeds", "links")
+
+def exclusive(stages):
+    # stages with "parse", which is timed around block conversion and so
+    # includes "inline", reduced to its own time
+    stages = dict(stages)
+    if "parse" in stages:
+        stages["parse"] = max(0.0, stages["parse"] - stages.get("inline", 0.0))
+    return stages
+
+class BuildProfile:
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.pages = []
+        self.wall = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def add_page(self, path, page_profile):
+        # page_profile is the to_dict(raw=True) of the profile a page was
+        # rendered with, possibly in a worker process; its stages are kept
+        # inclusive so "inline" is subtracted once, when reporting
+        for name, seconds in page_profile["stages"].items():
+            self.stages[name] += seconds
+        for name, amount in page_profile["counters"].items():
+            self.counters[name] += amount
+        self.pages.append((path, sum(exclusive(page_profile["stages"]).values())))
+
+    def slowest_pages(self, count=10):
+        return sorted(self.pages, key=lambda page: page[1], reverse=True)[:count]
+
+    def exclusive_stages(self):
+        return exclusive(self.stages)
+
+    def to_dict(self, raw=False):
+        # raw keeps the stages as timed, for passing to add_page
+        return {
+            "stages": dict(self.stages) if raw else self.exclusive_stages(),
+            "counters": dict(self.counters),
+            "pages": [{"path": path, "seconds": seconds} for path, seconds in self.pages],
+            "wall": self.wall,
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def report(self, top=10):
+        stages = self.exclusive_stages()
+        total = sum(stages.values())
+        names = [name for name in STAGES if name in stages]
+        names += sorted(name for name in stages if name not in STAGES)
+        lines = [f"Build profile: {len(self.pages)} pages, {total * 1000:.1f} ms across stages"]
+        if self.wall is not None:
+            lines[0] += f", {self.wall * 1000:.1f} ms wall"
+        lines.append(f"  {'stage':<10} {'ms':>10} {'share':>7}")
+        for name in names:
+            share = stages[name] / total if total else 0.0
+            lines.append(f"  {name:<10} {stages[name] * 1000:>10.1f} {share:>7.1%}")
+        if self.counters:
+            counters = ", ".join(f"{name}={amount}" for name, amount in sorted(self.counters.items()))
+            lines.append(f"  counters: {counters}")
+        if self.pages:
+            lines.append("  slowest pages:")
+            for path, seconds in self.slowest_pages(top):
+                lines.append(f"  {seconds * 1000:>10.2f} ms  {path}")
+        return "\n".join(lines)
+
+def stage(profile, name):
+    # Times a stage when profiling, otherwise does nothing
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name)
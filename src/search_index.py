@@ -0,0 +1,307 @@
+import json
+import os
+import re
+import shutil
+from collections import Counter, defaultdict
+from functools import lru_cache
+from manifest import output_url
+from postprocess import VARIANT_SUFFIXES, remove_variants
+from writer import write_output
+
+# Directory under the output holding pages.json, the shards and the client
+SEARCH_DIR = "search"
+MIN_TERM_LENGTH = 2
+
+# A body fragment is its text nodes' values wrapped in tags, so dropping
+# the tags recovers their words in order without parsing the Markdown
+# again. Code blocks, between pre tags, stay out of the index.
+_PRE_TAG_PATTERN = re.compile(r"<(/?)pre\b[^>]*>", re.I)
+_TAG_PATTERN = re.compile(r"</?[a-zA-Z!][^>]*>")
+_TERM_PATTERN = re.compile(r"\w{%d,}" % MIN_TERM_LENGTH)
+_SHARD_PATTERN = re.compile(r"[a-z0-9_]+")
+# Every ASCII character \w does not match, mapped to a space
+_ASCII_SEPARATORS = {code: " " for code in range(128) if not re.match(r"\w", chr(code))}
+
+# Filled in by client_script; step moves j past one posting of the flat
+# lists SearchIndex writes
+_CLIENT_SCRIPT = """(function () {
+  // Loaded as <script src="/search/search.js"></script>; siteSearch(query)
+  // resolves to the pages containing every word of query, best first
+  var base = document.currentScript.src.replace(/[^/]*$/, "");
+  var site = base.replace(/search\\/$/, "");
+  var loaded = {};
+  function load(name) {
+    if (!loaded[name]) {
+      loaded[name] = fetch(base + name + ".json").then(function (response) {
+        return response.ok ? response.json() : {};
+      });
+    }
+    return loaded[name];
+  }
+  function shardName(term) {
+    var prefix = term.slice(0, 2);
+    return /^[a-z0-9_]+$/.test(prefix) ? prefix : "other";
+  }
+  function terms(query) {
+    return (query.toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || []).filter(function (term) {
+      return term.length >= %(min_length)d;
+    });
+  }
+  window.siteSearch = function (query) {
+    var words = terms(query);
+    if (!words.length) {
+      return Promise.resolve([]);
+    }
+    return Promise.all([load("pages")].concat(words.map(function (word) {
+      return load(shardName(word));
+    }))).then(function (shards) {
+      var pages = shards[0];
+      var scores = null;
+      words.forEach(function (word, i) {
+        var found = {};
+        var postings = shards[i + 1][word] || [];
+        for (var j = 0; j < postings.length; j += %(step)s) {
+          var id = postings[j];
+          if (scores === null || id in scores) {
+            found[id] = (scores === null ? 0 : scores[id]) + postings[j + 1];
+          }
+        }
+        scores = found;
+      });
+      return Object.keys(scores).map(function (id) {
+        return {url: site + pages[id][0].slice(1), title: pages[id][1], score: scores[id]};
+      }).sort(function (a, b) {
+        return b.score - a.score;
+      });
+    });
+  };
+})();
+"""
+
+def client_script(positions=False):
+    step = "postings[j + 1] + 2" if positions else "2"
+    return _CLIENT_SCRIPT % {"min_length": MIN_TERM_LENGTH, "step": step}
+
+class TermCollector:
+    # Collects {term: count} from HTML fed in one or more chunks that each
+    # hold whole tags, as Template.stream writes them; with positions set,
+    # {term: [positions]} instead. Positions count indexed terms, so adjacent
+    # terms differ by one.
+
+    def __init__(self, positions=False):
+        self.positions = positions
+        self.terms = defaultdict(list) if positions else Counter()
+        self.count = 0
+        self._in_pre = False
+
+    def feed(self, html):
+        pos = 0
+        for match in _PRE_TAG_PATTERN.finditer(html):
+            if not self._in_pre:
+                self._add(html[pos:match.start()])
+            self._in_pre = not match.group(1)
+            pos = match.end()
+        if not self._in_pre:
+            self._add(html[pos:])
+
+    def _add(self, html):
+        if "<" in html:
+            html = _TAG_PATTERN.sub(" ", html)
+        words = _words(html.lower())
+        if not self.positions:
+            self.terms.update(words)
+            return
+        terms = self.terms
+        for position, word in enumerate(words, self.count):
+            terms[word].append(position)
+        self.count += len(words)
+
+def _words(text):
+    # _TERM_PATTERN.findall(text); in ASCII text, the common case, splitting
+    # at the characters \w does not match finds the same words much quicker
+    if text.isascii():
+        return [word for word in text.translate(_ASCII_SEPARATORS).split() if len(word) >= MIN_TERM_LENGTH]
+    return _TERM_PATTERN.findall(text)
+
+def page_terms(html, positions=False):
+    collector = TermCollector(positions)
+    collector.feed(html)
+    return dict(collector.terms)
+
+def node_terms(node, positions=False):
+    # page_terms(node.to_html()), taken from the values of the leaf nodes the
+    # parser built, so a freshly parsed page is not stripped of its tags again
+    values = []
+    _leaf_values(node, values)
+    collector = TermCollector(positions)
+    collector._add(" ".join(values))
+    return dict(collector.terms)
+
+def _leaf_values(node, values):
+    if node.children is None:
+        values.append(node.value)
+    elif node.tag != "pre":
+        for child in node.children:
+            _leaf_values(child, values)
+
+# A site has a few thousand distinct terms, each seen on many pages
+@lru_cache(maxsize=None)
+def shard_name(term):
+    prefix = term[:2]
+    return prefix if _SHARD_PATTERN.fullmatch(prefix) else "other"
+
+def _add_posting(postings, page_id, positions):
+    # Appends page id, count, first position, gaps to the following positions
+    postings.append(page_id)
+    postings.append(len(positions))
+    previous = 0
+    for position in positions:
+        postings.append(position - previous)
+        previous = position
+
+def _split_postings(postings, positions):
+    # The flat postings of a term, one list per page
+    split = []
+    i = 0
+    while i < len(postings):
+        end = i + 2 + (postings[i + 1] if positions else 0)
+        split.append(postings[i:end])
+        i = end
+    return split
+
+class SearchIndex:
+    # Inverted index over the site, written to dest_dir/search as
+    # pages.json (page id -> [url, title]) and one JSON shard per two-letter
+    # term prefix mapping each term to one flat list of postings by page id:
+    # page id, count, and with positions set the positions as _add_posting
+    # appends them. Flat lists of numbers keep the shards small and quick to
+    # encode. The state, persisted in the build manifest, records which
+    # shards every page appears in, so an update rewrites only the shards
+    # the changed pages touch.
+
+    def __init__(self, dest_dir, state=None, positions=False):
+        self.dest_dir = dest_dir
+        self.directory = os.path.join(dest_dir, SEARCH_DIR)
+        self.positions = positions
+        state = state or {}
+        self.pages = state.get("pages", {})
+        self.next_id = state.get("next_id", 0)
+        self._added = {}
+        self._dropped = {}
+
+    @classmethod
+    def load(cls, dest_dir, state=None, positions=False):
+        # Without pages.json, or with postings of another kind, the shards
+        # on disk cannot be patched, so they are dropped and every page is
+        # indexed again
+        index = cls(dest_dir, state, positions)
+        if (state or {}).get("postings") != index.posting_kind() or not os.path.exists(os.path.join(index.directory, "pages.json")):
+            remove_search_index(dest_dir)
+            index = cls(dest_dir, positions=positions)
+        return index
+
+    def posting_kind(self):
+        return "positions" if self.positions else "counts"
+
+    def url(self, dest_path):
+        return output_url(dest_path, self.dest_dir)
+
+    def __contains__(self, dest_path):
+        return self.url(dest_path) in self.pages
+
+    def remove(self, dest_path):
+        page = self.pages.pop(self.url(dest_path), None)
+        if page is not None:
+            self._dropped[page["id"]] = page["shards"]
+
+    def update(self, dest_path, title, terms):
+        url = self.url(dest_path)
+        page = self.pages.get(url)
+        if page is None:
+            page = {"id": self.next_id}
+            self.next_id += 1
+        else:
+            self._dropped[page["id"]] = page["shards"]
+        page["title"] = title
+        page["shards"] = sorted(set(map(shard_name, terms)))
+        self.pages[url] = page
+        self._added[page["id"]] = terms
+
+    def _read_shard(self, path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write(self, compress=False):
+        # Patches the shards touched since the last write; returns how many
+        # were rewritten
+        by_term = {}
+        for page_id in sorted(self._added):
+            for term, value in self._added[page_id].items():
+                postings = by_term.setdefault(term, [])
+                if self.positions:
+                    _add_posting(postings, page_id, value)
+                else:
+                    postings.extend((page_id, value))
+        by_shard = {}
+        for page_id, shards in self._dropped.items():
+            for name in shards:
+                by_shard.setdefault(name, {})
+        for term, postings in by_term.items():
+            by_shard.setdefault(shard_name(term), {})[term] = postings
+        changed_ids = self._dropped.keys() | self._added.keys()
+
+        os.makedirs(self.directory, exist_ok=True)
+        written = 0
+        for name, additions in sorted(by_shard.items()):
+            path = os.path.join(self.directory, name + ".json")
+            shard = {}
+            for term, postings in self._read_shard(path).items():
+                kept = [posting for posting in _split_postings(postings, self.positions) if posting[0] not in changed_ids]
+                if kept:
+                    shard[term] = [value for posting in kept for value in posting]
+            for term, postings in additions.items():
+                if term in shard:
+                    merged = sorted(_split_postings(shard[term] + postings, self.positions))
+                    postings = [value for posting in merged for value in posting]
+                shard[term] = postings
+            if shard:
+                written += write_output(path, _dump(shard), compress)
+            elif os.path.exists(path):
+                os.remove(path)
+                remove_variants(path)
+                written += 1
+
+        pages = [None] * self.next_id
+        for url, page in self.pages.items():
+            pages[page["id"]] = [url, page["title"]]
+        write_output(os.path.join(self.directory, "pages.json"), _dump(pages), compress)
+        write_output(os.path.join(self.directory, "search.js"), client_script(self.positions).encode(), compress)
+        self._added = {}
+        self._dropped = {}
+        return written
+
+    def remove_variants(self):
+        # Drops every precompressed shard, as when compression is turned off
+        if not os.path.isdir(self.directory):
+            return
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(VARIANT_SUFFIXES):
+                    os.remove(entry.path)
+
+    def to_dict(self):
+        return {"pages": self.pages, "next_id": self.next_id, "postings": self.posting_kind()}
+
+    def __repr__(self):
+        return f"SearchIndex({self.directory}, {len(self.pages)} pages)"
+
+def _dump(value):
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode()
+
+def remove_search_index(dest_dir):
+    directory = os.path.join(dest_dir, SEARCH_DIR)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
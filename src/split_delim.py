@@ -20,66 +20,119 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
             new_nodes.append(node)
     return new_nodes
 
+_IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# Images and links in one alternation; an image can never overlap a link
+# match, so a leftmost scan yields the same spans as image-then-link passes
+_MEDIA_PATTERN = re.compile(_IMAGE_PATTERN.pattern + "|" + _LINK_PATTERN.pattern)
+
+# Applied outermost first: text inside a bold span is never split on "_"
+_INLINE_DELIMITERS = [
+    ("**", TextType.BOLD_TEXT),
+    ("_", TextType.ITALIC_TEXT),
+    ("`", TextType.CODE_TEXT),
+]
+
+def register_inline_delimiter(delimiter, text_type):
+    # Spans wrapped in delimiter become TextNodes of text_type; registered
+    # delimiters are applied after the built-in ones, innermost
+    _INLINE_DELIMITERS.append((delimiter, text_type))
+
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _LINK_PATTERN.findall(text)
 
-def split_nodes_image(old_nodes):
+def _split_nodes_pattern(old_nodes, pattern, text_type):
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.PLAIN_TEXT:
             new_nodes.append(node)
             continue
-        images = extract_markdown_images(node.text)
-        if not images:
+        text = node.text
+        pos = 0
+        for match in pattern.finditer(text):
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos:match.start()], TextType.PLAIN_TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
+        if pos == 0:
             new_nodes.append(node)
-            continue
-        remaining_text = node.text
-        for alt, url in images:
-            sections = remaining_text.split(f"![{alt}]({url})", 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.PLAIN_TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            remaining_text = sections[1]
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.PLAIN_TEXT))
+        elif pos < len(text):
+            new_nodes.append(TextNode(text[pos:], TextType.PLAIN_TEXT))
     return new_nodes
 
+def split_nodes_image(old_nodes):
+    return _split_nodes_pattern(old_nodes, _IMAGE_PATTERN, TextType.IMAGE)
+
 def split_nodes_link(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.PLAIN_TEXT:
-            new_nodes.append(node)
-            continue
-        links = extract_markdown_links(node.text)
-        if not links:
-            new_nodes.append(node)
+    return _split_nodes_pattern(old_nodes, _LINK_PATTERN, TextType.LINK)
+
+def _scan_media(text, nodes):
+    pos = 0
+    for match in _MEDIA_PATTERN.finditer(text):
+        if match.start() > pos:
+            nodes.append(TextNode(text[pos:match.start()], TextType.PLAIN_TEXT))
+        if match.group(3) is None:
+            nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        else:
+            nodes.append(TextNode(match.group(3), TextType.LINK, match.group(4)))
+        pos = match.end()
+    if pos < len(text):
+        nodes.append(TextNode(text[pos:], TextType.PLAIN_TEXT))
+
+def _scan_inline(text, level, nodes):
+    while level < len(_INLINE_DELIMITERS):
+        delimiter, text_type = _INLINE_DELIMITERS[level]
+        level += 1
+        if delimiter not in text:
             continue
-        remaining_text = node.text
-        for alt, url in links:
-            sections = remaining_text.split(f"[{alt}]({url})", 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.PLAIN_TEXT))
-            new_nodes.append(TextNode(alt, TextType.LINK, url))
-            remaining_text = sections[1]
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.PLAIN_TEXT))
-    return new_nodes
+        parts = text.split(delimiter)
+        if len(parts) % 2 == 0:
+            raise Exception("Invalid Markdown Syntax")
+        for i, part in enumerate(parts):
+            if not part:  # Only add if not empty
+                continue
+            if i % 2 == 0:
+                _scan_inline(part, level, nodes)
+            else:
+                nodes.append(TextNode(part, text_type))
+        return
+    _scan_media(text, nodes)
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.PLAIN_TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD_TEXT)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC_TEXT)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE_TEXT)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # One sweep producing the same nodes as running split_nodes_delimiter
+    # for "**", "_" and "`" followed by split_nodes_image and split_nodes_link
+    nodes = []
+    _scan_inline(text, 0, nodes)
     return nodes
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    return [block.strip() for block in blocks if block.strip()]
+    blocks = (block.strip() for block in markdown.split("\n\n"))
+    return [block for block in blocks if block]
+
+def iter_blocks(lines):
+    # Streaming markdown_to_blocks: takes an iterable of lines, such as an
+    # open file, and yields the same blocks while holding only one of them.
+    # Blocks are separated by empty lines, which is what splitting on
+    # "\n\n" and stripping amounts to.
+    group = []
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line:
+            group.append(line)
+            continue
+        if group:
+            block = "\n".join(group).strip()
+            if block:
+                yield block
+            group = []
+    if group:
+        block = "\n".join(group).strip()
+        if block:
+            yield block
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -89,33 +142,64 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+# Custom lexers, each taking a block and returning (block_type, token) or
+# None; tried in registration order before the built-in block types
+_BLOCK_LEXERS = []
+
+def register_block_lexer(lex):
+    _BLOCK_LEXERS.append(lex)
+
 def block_to_block_type(block):
+    return lex_block(block)[0]
+
+def lex_block(block):
+    # Classifies a block and splits it into what its converter needs in one
+    # scan of its lines: (level, text) for headings, the code text, the item
+    # texts of lists, the marker-stripped lines of quotes, or the lines of a
+    # paragraph
+    for lex in _BLOCK_LEXERS:
+        lexed = lex(block)
+        if lexed is not None:
+            return lexed
     if block.startswith("#"):
-        count = 0
-        for char in block:
-            if char == "#":
-                count += 1
-            else:
-                break
-        if 1 <= count <=6 and len(block) > count and block[count] == " ":
-            return BlockType.HEADING
+        count = len(block) - len(block.lstrip("#"))
+        if 1 <= count <= 6 and len(block) > count and block[count] == " ":
+            return BlockType.HEADING, (count, block[count + 1:])
     if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
-    
+        return BlockType.CODE, block[3:-3].lstrip("\n")
+
     lines = block.split("\n")
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
-    
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
-    
-    is_ordered = True
-    for i, line in enumerate(lines):
-        expected_start = f"{i + 1}. "
-        if not line.startswith(expected_start):
-            is_ordered = False
-            break
-    if is_ordered:
-        return BlockType.ORDERED_LIST
-    
-    return BlockType.PARAGRAPH
\ No newline at end of file
+    first = lines[0]
+    if first.startswith("- "):
+        items = []
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH, lines
+            items.append(line[2:])
+        return BlockType.UNORDERED_LIST, items
+
+    if first.startswith(">"):
+        items = []
+        for line in lines:
+            if line.startswith("> "):
+                items.append(line[2:])
+            elif line.startswith(">"):
+                items.append(line[1:])
+            else:
+                return BlockType.PARAGRAPH, lines
+        return BlockType.QUOTE, items
+
+    if first.startswith("1. "):
+        items = []
+        number = 0
+        for line in lines:
+            number += 1
+            # "N. " without formatting a prefix string for every line
+            digits = str(number)
+            width = len(digits)
+            if not (line.startswith(digits) and line.startswith(". ", width)):
+                return BlockType.PARAGRAPH, lines
+            items.append(line[width + 2:])
+        return BlockType.ORDERED_LIST, items
+
+    return BlockType.PARAGRAPH, lines
@@ -0,0 +1,184 @@
+import os
+import re
+
+# Placeholders a template may contain, e.g. "{{ Title }}"
+SLOTS = ("Title", "Content")
+
+_SLOT_PATTERN = re.compile(r"\{\{ (" + "|".join(SLOTS) + r") \}\}")
+# {{ include "partials/header.html" }}, relative to the including file
+_INCLUDE_PATTERN = re.compile(r'\{\{ include "([^"]+)" \}\}')
+_ROOT_URL_PATTERN = re.compile(r'(?:href|src)="(/[^"]*)"')
+_ASSET_URL_PATTERN = re.compile(r'((?:href|src)="/)([^"?#]*)')
+# {{ block name }}default{{ endblock }}, overridable by extending layouts
+_BLOCK_PATTERN = re.compile(r"\{\{ block (\w+) \}\}(.*?)\{\{ endblock \}\}", re.S)
+_EXTENDS = "{{ extends }}"
+
+# Name of the per-directory layout file inside the content tree
+TEMPLATE_NAME = "template.html"
+
+def find_root_urls(html):
+    # Root-relative URLs in href/src attributes, before basepath rewriting
+    return _ROOT_URL_PATTERN.findall(html)
+
+def rewrite_root_paths(html, basepath):
+    # Replace root paths with basepath for deployment
+    if basepath == "/":
+        return html
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+def rewrite_asset_urls(html, assets):
+    # Points root-relative href/src URLs at the fingerprinted names in assets
+    # (see fingerprint.build_asset_manifest), keeping any query or fragment
+    if not assets:
+        return html
+
+    def asset(match):
+        return match.group(1) + assets.get(match.group(2), match.group(2))
+
+    return _ASSET_URL_PATTERN.sub(asset, html)
+
+class Template:
+    def __init__(self, source, basepath="/", path=None, dependencies=None, assets=None):
+        self.path = path
+        self.basepath = basepath
+        self.assets = assets
+        # Files the compiled template was built from: itself and its partials
+        self.dependencies = dependencies or ([path] if path else [])
+        source = _BLOCK_PATTERN.sub(lambda match: match.group(2), source)
+        self.refs = find_root_urls(source)
+        source = self._rewrite(source)
+        # Alternating literal text and slot names: [text, slot, text, ..., text]
+        self.parts = _SLOT_PATTERN.split(source)
+
+    def _rewrite(self, html):
+        return rewrite_root_paths(rewrite_asset_urls(html, self.assets), self.basepath)
+
+    def render(self, title, content):
+        values = {
+            "Title": self._rewrite(title),
+            "Content": self._rewrite(content),
+        }
+        chunks = self.parts[:]
+        for i in range(1, len(chunks), 2):
+            chunks[i] = values[chunks[i]]
+        return "".join(chunks)
+
+    def stream(self, write, title, write_content):
+        # Like render, but the content is produced in chunks by calling
+        # write_content(write) for each {{ Content }} slot, so the page never
+        # has to exist as a single string
+        content_write = write
+        if self.basepath != "/" or self.assets:
+            content_write = lambda chunk: write(self._rewrite(chunk))
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                write(part)
+            elif part == "Title":
+                write(self._rewrite(title))
+            else:
+                write_content(content_write)
+
+    def __repr__(self):
+        return f"Template({self.path}, {self.basepath})"
+
+def _expand_includes(path, dependencies, stack=()):
+    if path in stack:
+        raise Exception(f"include cycle: {' -> '.join(stack + (path,))}")
+    with open(path, 'r') as f:
+        source = f.read()
+    dependencies.append(path)
+    base_dir = os.path.dirname(path)
+
+    def include(match):
+        return _expand_includes(os.path.join(base_dir, match.group(1)), dependencies, stack + (path,))
+
+    return _INCLUDE_PATTERN.sub(include, source)
+
+def load_template(template_path, basepath="/", assets=None):
+    dependencies = []
+    source = _expand_includes(template_path, dependencies)
+    return Template(source, basepath, template_path, list(dict.fromkeys(dependencies)), assets)
+
+def _apply_blocks(parent_source, child_source):
+    # Replaces the parent's blocks with the child's overrides, keeping the
+    # markers so a layout further down can override them again
+    overrides = dict(_BLOCK_PATTERN.findall(child_source))
+
+    def block(match):
+        name = match.group(1)
+        body = overrides.get(name, match.group(2))
+        return f"{{{{ block {name} }}}}{body}{{{{ endblock }}}}"
+
+    return _BLOCK_PATTERN.sub(block, parent_source)
+
+class LayoutResolver:
+    # Picks each page's layout: the nearest template.html in its directory or
+    # an ancestor inside the content tree, else root_template. A layout whose
+    # source starts with {{ extends }} inherits the layout of the directory
+    # above it and overrides its blocks. Every layout is compiled once.
+
+    def __init__(self, root_template, content_dir, basepath="/", assets=None):
+        self.root_template = root_template
+        self.content_dir = os.path.normpath(content_dir)
+        self.basepath = basepath
+        self.assets = assets
+        self._by_dir = {}
+        self._sources = {}
+        self._templates = {}
+
+    def template_for(self, page_path, layout=None):
+        # layout, from a page's front matter, names a template relative to the
+        # directory of root_template and overrides the nearest one
+        if layout:
+            path = os.path.join(os.path.dirname(self.root_template), layout)
+            if not os.path.isfile(path):
+                raise Exception(f"{page_path}: layout {layout} not found")
+            return self.load(path)
+        return self.load(self._layout_path(os.path.dirname(page_path)))
+
+    def templates(self):
+        return list(self._templates.values())
+
+    def _layout_path(self, directory):
+        directory = os.path.normpath(directory)
+        if directory not in self._by_dir:
+            candidate = os.path.join(directory, TEMPLATE_NAME)
+            if os.path.isfile(candidate):
+                path = candidate
+            elif directory == self.content_dir or not directory.startswith(self.content_dir + os.sep):
+                path = self.root_template
+            else:
+                path = self._layout_path(os.path.dirname(directory))
+            self._by_dir[directory] = path
+        return self._by_dir[directory]
+
+    def _parent_layout(self, path):
+        if os.path.normpath(path) == os.path.normpath(self.root_template):
+            return None
+        directory = os.path.normpath(os.path.dirname(path))
+        # Layouts outside the content tree, such as front matter ones, extend
+        # root_template itself rather than a template.html found next to them
+        if directory == self.content_dir or not directory.startswith(self.content_dir + os.sep):
+            return self.root_template
+        return self._layout_path(os.path.dirname(directory))
+
+    def _source(self, path):
+        if path not in self._sources:
+            dependencies = []
+            source = _expand_includes(path, dependencies)
+            if source.lstrip().startswith(_EXTENDS):
+                parent = self._parent_layout(path)
+                if parent is None:
+                    raise Exception(f"{path} uses {_EXTENDS} but has no parent layout")
+                parent_source, parent_dependencies = self._source(parent)
+                source = _apply_blocks(parent_source, source)
+                dependencies.extend(parent_dependencies)
+            self._sources[path] = (source, list(dict.fromkeys(dependencies)))
+        return self._sources[path]
+
+    def load(self, path):
+        if path not in self._templates:
+            source, dependencies = self._source(path)
+            self._templates[path] = Template(source, self.basepath, path, dependencies, self.assets)
+        return self._templates[path]
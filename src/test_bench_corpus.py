@@ -0,0 +1,35 @@
+import os
+import random
+import tempfile
+import unittest
+from bench_corpus import SHAPES, generate_corpus, page_markdown
+from bench_suite import compare
+from markdown_to_html import markdown_to_html_node
+
+
+class TestBenchCorpus(unittest.TestCase):
+
+    def test_every_shape_parses(self):
+        for name, (shape, _, _) in SHAPES.items():
+            markdown = page_markdown(shape, random.Random(name), 3)
+            self.assertTrue(markdown.startswith("# "))
+            self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div>"))
+
+    def test_generate_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            count = generate_corpus(first, "links", 0.02)
+            generate_corpus(second, "links", 0.02)
+            self.assertEqual(count, 2)
+            path = os.path.join("content", "section1", "group0", "page1", "index.md")
+            with open(os.path.join(first, path)) as a, open(os.path.join(second, path)) as b:
+                self.assertEqual(a.read(), b.read())
+            self.assertTrue(os.path.exists(os.path.join(first, "template.html")))
+
+    def test_compare_flags_regressions(self):
+        baseline = {"small": {"mb_per_s": 10.0}, "huge": {"mb_per_s": 10.0}}
+        results = {"small": {"mb_per_s": 8.0}, "huge": {"mb_per_s": 9.5}, "code": {"mb_per_s": 1.0}}
+        self.assertEqual(compare(results, baseline, 0.15), ["small"])
+
+
+if __name__ == "__main__":
+    unittest.main()
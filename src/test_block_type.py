@@ -1,5 +1,5 @@
 import unittest
-from split_delim import block_to_block_type, BlockType
+from split_delim import block_to_block_type, lex_block, BlockType
 
 
 class TestBlockToBlockType(unittest.TestCase):
@@ -93,5 +93,29 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
 
+class TestLexBlock(unittest.TestCase):
+
+    def test_heading_token(self):
+        self.assertEqual(lex_block("### Title\nmore"), (BlockType.HEADING, (3, "Title\nmore")))
+
+    def test_code_token(self):
+        self.assertEqual(lex_block("```\nx = 1\n```"), (BlockType.CODE, "x = 1\n"))
+
+    def test_list_items(self):
+        self.assertEqual(lex_block("- a\n- b"), (BlockType.UNORDERED_LIST, ["a", "b"]))
+        block = "\n".join(f"{i}. item {i}" for i in range(1, 12))
+        block_type, items = lex_block(block)
+        self.assertEqual(block_type, BlockType.ORDERED_LIST)
+        self.assertEqual(items[-1], "item 11")
+
+    def test_quote_lines_are_stripped(self):
+        self.assertEqual(lex_block("> a\n>b"), (BlockType.QUOTE, ["a", "b"]))
+
+    def test_broken_list_is_paragraph_lines(self):
+        self.assertEqual(lex_block("1. a\n3. b"), (BlockType.PARAGRAPH, ["1. a", "3. b"]))
+        self.assertEqual(lex_block("- a\nb"), (BlockType.PARAGRAPH, ["- a", "b"]))
+        self.assertEqual(lex_block("10. a"), (BlockType.PARAGRAPH, ["10. a"]))
+
+
 if __name__ == "__main__":
     unittest.main()
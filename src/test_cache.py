@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from cache import FragmentCache
+from generate_page import RenderOptions, render_page
+from template import Template
+
+
+class TestFragmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = FragmentCache(os.path.join(self.tmp.name, "cache"), 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        key = self.cache.key("# Title")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get(key), "<div><h1>Title</h1></div>")
+
+    def test_key_depends_on_source(self):
+        self.assertEqual(self.cache.key("a"), self.cache.key("a"))
+        self.assertNotEqual(self.cache.key("a"), self.cache.key("b"))
+
+    def test_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "x" * 400)
+            path = self.cache._path(key)
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        # Reading the oldest entry makes it the most recently used
+        self.cache.get(keys[0])
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+        self.assertLessEqual(self.cache.size(), 1000)
+
+    def test_clear(self):
+        key = self.cache.key("a")
+        self.cache.put(key, "fragment")
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.size(), 0)
+
+    def test_render_page_reuses_cached_fragment(self):
+        source = os.path.join(self.tmp.name, "index.md")
+        dest = os.path.join(self.tmp.name, "index.html")
+        with open(source, "w") as f:
+            f.write("# Title\n\nBody")
+        template = Template("{{ Title }}:{{ Content }}")
+        with redirect_stdout(StringIO()):
+            first = render_page(source, template, dest, RenderOptions(cache=self.cache), True)["profile"]
+            self.assertEqual(first["counters"]["cache_misses"], 1)
+            with open(dest) as f:
+                self.assertEqual(f.read(), "Title:<div><h1>Title</h1><p>Body</p></div>")
+            # A planted fragment proves the second render skipped parsing
+            self.cache.put(self.cache.key("# Title\n\nBody"), "<div>cached</div>")
+            second = render_page(source, Template("{{ Content }}"), dest, RenderOptions(cache=self.cache), True)["profile"]
+        self.assertEqual(second["counters"]["cache_hits"], 1)
+        self.assertNotIn("blocks", second["counters"])
+        with open(dest) as f:
+            self.assertEqual(f.read(), "<div>cached</div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from copy_static import sync_static
+from file_index import FileIndex
+from fingerprint import build_asset_manifest
+
+
+class TestSyncStatic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.manifest = os.path.join(self.tmp.name, ".build", "manifest.json")
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "a.png"), "png-bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, compare="mtime", fingerprint=False, **options):
+        out = io.StringIO()
+        index = FileIndex.scan(self.src)
+        assets = build_asset_manifest(index) if fingerprint else None
+        with redirect_stdout(out):
+            sync_static(self.src, self.dest, self.manifest, compare, index, assets, **options)
+        return out.getvalue()
+
+    def test_minify_and_compress(self):
+        self.write(os.path.join(self.src, "index.css"), "body {\n  color: red;\n}\n")
+        self.sync(minify=True, compress=True)
+        css = os.path.join(self.dest, "index.css")
+        with open(css) as f:
+            self.assertEqual(f.read(), "body{color:red}")
+        self.assertTrue(os.path.exists(css + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png.gz")))
+        self.assertEqual(self.sync(minify=True, compress=True).count("Copying file"), 0)
+        output = self.sync()
+        self.assertEqual(output.count("Copying file"), 1)
+        self.assertFalse(os.path.exists(css + ".gz"))
+        with open(css) as f:
+            self.assertEqual(f.read(), "body {\n  color: red;\n}\n")
+
+    def test_fingerprinted_copies(self):
+        self.sync(fingerprint=True)
+        names = sorted(os.listdir(self.dest))
+        self.assertEqual(len(names), 3)
+        self.assertRegex(names[1], r"^index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(self.sync(fingerprint=True).count("Copying file"), 0)
+        self.write(os.path.join(self.src, "index.css"), "body { color: red }")
+        output = self.sync(fingerprint=True)
+        self.assertEqual(output.count("Copying file"), 2)
+        self.assertIn(os.path.join(self.dest, names[1]), output)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, names[1])))
+        self.sync()
+        self.assertEqual(sorted(os.listdir(self.dest)), ["images", "index.css"])
+
+    def test_first_sync_copies_everything(self):
+        output = self.sync()
+        self.assertEqual(output.count("Copying file"), 2)
+        with open(os.path.join(self.dest, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png-bytes")
+
+    def test_preserves_mtime(self):
+        self.sync()
+        src = os.stat(os.path.join(self.src, "index.css"))
+        dest = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertEqual(src.st_mtime_ns, dest.st_mtime_ns)
+
+    def test_second_sync_copies_nothing(self):
+        self.sync()
+        output = self.sync()
+        self.assertNotIn("Copying file", output)
+        self.assertIn("0 copied, 0 removed, 2 unchanged", output)
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        path = os.path.join(self.src, "index.css")
+        self.write(path, "body { color: red }")
+        output = self.sync()
+        self.assertEqual(output.count("Copying file"), 1)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+
+    def test_same_size_change_detected_by_mtime(self):
+        self.sync()
+        path = os.path.join(self.src, "index.css")
+        self.write(path, "body {!}")
+        self.write(path, "body ()")
+        os.utime(path, ns=(1, 1))
+        output = self.sync()
+        self.assertEqual(output.count("Copying file"), 1)
+
+    def test_hash_compare_ignores_touched_file(self):
+        self.sync("hash")
+        os.utime(os.path.join(self.src, "index.css"), ns=(1, 1))
+        output = self.sync("hash")
+        self.assertNotIn("Copying file", output)
+
+    def test_removed_source_removes_copy(self):
+        self.sync()
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        output = self.sync()
+        self.assertIn("Removing stale file", output)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+    def test_generated_files_are_kept(self):
+        self.write(os.path.join(self.dest, "index.html"), "<html></html>")
+        self.sync()
+        self.sync()
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
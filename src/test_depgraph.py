@@ -0,0 +1,44 @@
+import unittest
+from depgraph import DependencyGraph
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = DependencyGraph({
+            "docs/index.html": ["content/index.md", "template.html", "static/a.png"],
+            "docs/blog/index.html": ["content/blog/index.md", "template.html"],
+        })
+
+    def test_affected_by_shared_input(self):
+        self.assertEqual(
+            self.graph.affected({"template.html"}),
+            {"docs/index.html", "docs/blog/index.html"},
+        )
+
+    def test_affected_by_single_input(self):
+        self.assertEqual(self.graph.affected({"static/a.png"}), {"docs/index.html"})
+        self.assertEqual(self.graph.affected({"content/blog/index.md"}), {"docs/blog/index.html"})
+
+    def test_unknown_input_affects_nothing(self):
+        self.assertEqual(self.graph.affected({"static/unused.png"}), set())
+
+    def test_set_dependencies_replaces_edges(self):
+        self.graph.set_dependencies("docs/index.html", ["content/index.md", "template.html"])
+        self.assertEqual(self.graph.affected({"static/a.png"}), set())
+        self.assertNotIn("static/a.png", self.graph.inputs())
+
+    def test_remove_output(self):
+        self.graph.remove_output("docs/blog/index.html")
+        self.assertNotIn("docs/blog/index.html", self.graph)
+        self.assertEqual(self.graph.dependents("template.html"), {"docs/index.html"})
+        self.assertNotIn("content/blog/index.md", self.graph.inputs())
+
+    def test_round_trip(self):
+        copy = DependencyGraph.from_dict(self.graph.to_dict())
+        self.assertEqual(copy.to_dict(), self.graph.to_dict())
+        self.assertEqual(copy.dependencies("docs/index.html"), self.graph.dependencies("docs/index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
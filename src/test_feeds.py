@@ -0,0 +1,104 @@
+import io
+import os
+import tempfile
+import unittest
+import xml.dom.minidom
+from contextlib import redirect_stdout
+from unittest import mock
+import feeds
+from feeds import feed_chunks, sitemap_files, w3c_date, write_feeds, write_streamed
+
+SITE = "https://example.com/site"
+
+
+class TestFeedContent(unittest.TestCase):
+
+    def test_w3c_date(self):
+        self.assertEqual(w3c_date("2024-03-01"), "2024-03-01T00:00:00Z")
+        self.assertEqual(w3c_date("2024-03-01T10:00:00+02:00"), "2024-03-01T08:00:00Z")
+        self.assertEqual(w3c_date("2024-03-01T10:00:00Z"), "2024-03-01T10:00:00Z")
+        self.assertEqual(w3c_date("2024-03-01 10:00:00"), "2024-03-01T10:00:00Z")
+        self.assertEqual(w3c_date("2024-03-01T10:00"), "2024-03-01T10:00:00Z")
+        self.assertEqual(w3c_date("2024-03-01T10:00:00.5-01:30"), "2024-03-01T11:30:00Z")
+        self.assertIsNone(w3c_date("March"))
+        self.assertIsNone(w3c_date(None))
+
+    def test_sitemap(self):
+        files = sitemap_files([{"url": "/b/", "lastmod": "2024-03-01T00:00:00Z"}, {"url": "/a&b/"}], "docs", SITE)
+        self.assertEqual(list(files), [os.path.join("docs", "sitemap.xml")])
+        sitemap = "".join(files[os.path.join("docs", "sitemap.xml")]())
+        document = xml.dom.minidom.parseString(sitemap)
+        locs = [node.firstChild.data for node in document.getElementsByTagName("loc")]
+        self.assertEqual(locs, ["https://example.com/site/a&b/", "https://example.com/site/b/"])
+        self.assertIn("<lastmod>2024-03-01T00:00:00Z</lastmod>", sitemap)
+
+    def test_sitemap_index_past_limit(self):
+        entries = [{"url": f"/p{i}/"} for i in range(5)]
+        with mock.patch.object(feeds, "SITEMAP_LIMIT", 2):
+            files = sitemap_files(entries, "docs", SITE)
+        self.assertEqual(sorted(os.path.basename(path) for path in files), ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"])
+        index = "".join(files[os.path.join("docs", "sitemap.xml")]())
+        self.assertIn("<sitemapindex", index)
+        self.assertIn("<loc>https://example.com/site/sitemap-3.xml</loc>", index)
+        self.assertEqual("".join(files[os.path.join("docs", "sitemap-3.xml")]()).count("<url>"), 1)
+
+    def test_feed_newest_first(self):
+        posts = [
+            {"url": "/blog/old/", "title": "Old", "updated": "2023-01-01T00:00:00Z"},
+            {"url": "/blog/new/", "title": "Fish & <Chips>", "updated": "2024-01-01T00:00:00Z"},
+        ]
+        feed = "".join(feed_chunks(posts, SITE, "Blog", "/blog/", "example.com"))
+        document = xml.dom.minidom.parseString(feed)
+        titles = [node.firstChild.data for node in document.getElementsByTagName("title")]
+        self.assertEqual(titles, ["Blog", "Fish & <Chips>", "Old"])
+        self.assertIn('<link rel="self" href="https://example.com/site/blog/atom.xml"/>', feed)
+        self.assertIn("<updated>2024-01-01T00:00:00Z</updated>\n", feed)
+
+    def test_feed_orders_offset_dates_by_time(self):
+        # 09:00+02:00 is earlier than 08:00 UTC, though it sorts later as text
+        posts = [
+            {"url": "/blog/a/", "title": "A", "updated": w3c_date("2024-03-01T09:00:00+02:00")},
+            {"url": "/blog/b/", "title": "B", "updated": w3c_date("2024-03-01 08:00")},
+        ]
+        feed = "".join(feed_chunks(posts, SITE, "Blog", "/blog/", "example.com"))
+        document = xml.dom.minidom.parseString(feed)
+        titles = [node.firstChild.data for node in document.getElementsByTagName("title")]
+        self.assertEqual(titles, ["Blog", "B", "A"])
+
+
+class TestWriteFeeds(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sitemap.xml")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_digest_is_not_rewritten(self):
+        digest, written = write_streamed(self.path, lambda: iter(["<a>", "</a>"]))
+        self.assertTrue(written)
+        os.utime(self.path, ns=(1, 1))
+        self.assertEqual(write_streamed(self.path, lambda: iter(["<a></a>"]), digest), (digest, False))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1)
+        self.assertTrue(write_streamed(self.path, lambda: iter(["<b/>"]), digest)[1])
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<b/>")
+
+    def test_compressed_variants_follow_option(self):
+        digest, _ = write_streamed(self.path, lambda: iter(["<a/>"]), compress=True)
+        self.assertTrue(os.path.exists(self.path + ".gz"))
+        write_streamed(self.path, lambda: iter(["<a/>"]), digest)
+        self.assertFalse(os.path.exists(self.path + ".gz"))
+
+    def test_removed_files(self):
+        other = os.path.join(self.tmp.name, "sitemap-1.xml")
+        with redirect_stdout(io.StringIO()):
+            state = write_feeds({self.path: lambda: iter(["a"]), other: lambda: iter(["b"])})
+            state = write_feeds({self.path: lambda: iter(["a"])}, state)
+        self.assertEqual(list(state), [self.path])
+        self.assertFalse(os.path.exists(other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from file_index import FileIndex, RACY_WINDOW_NS, load_index, scan_tree, store_index
+
+
+class TestFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("index.md", "# Home")
+        self.write(os.path.join("blog", "post", "index.md"), "# Post")
+        self.write(os.path.join("blog", "cover.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_scan_tree_records_every_file(self):
+        files = scan_tree(self.root)
+        self.assertEqual(
+            set(files),
+            {"index.md", os.path.join("blog", "post", "index.md"), os.path.join("blog", "cover.png")},
+        )
+        self.assertEqual(files["index.md"]["size"], 6)
+        self.assertIn("mtime", files["index.md"])
+
+    def test_rel_path_and_signature(self):
+        index = FileIndex.scan(self.root)
+        path = os.path.join(self.root, "blog", "cover.png")
+        rel_path = index.rel_path(path)
+        self.assertEqual(index.path(rel_path), path)
+        self.assertIsNone(index.rel_path(os.path.join(self.root, "missing.md")))
+        self.assertTrue(index.signature(rel_path).startswith("3:"))
+
+    def test_unchanged_files_reuse_hashes(self):
+        first = FileIndex.scan(self.root)
+        digest = first.hash("index.md")
+        # As if the previous scan ran well after the files were written
+        first.scanned += 2 * RACY_WINDOW_NS
+        with mock.patch("file_index.hash_file") as hash_file:
+            second = FileIndex.scan(self.root, first)
+            self.assertEqual(second.hash("index.md"), digest)
+            hash_file.assert_not_called()
+
+    def test_recent_or_changed_files_are_rehashed(self):
+        first = FileIndex.scan(self.root)
+        first.hash("index.md")
+        self.assertNotIn("hash", FileIndex.scan(self.root, first).files["index.md"])
+        first.scanned += 2 * RACY_WINDOW_NS
+        self.write("index.md", "# Home again")
+        second = FileIndex.scan(self.root, first)
+        self.assertNotEqual(second.hash("index.md"), first.hash("index.md"))
+
+    def test_round_trip_through_manifest(self):
+        index = FileIndex.scan(self.root)
+        index.hash("index.md")
+        manifest = {}
+        store_index(manifest, index)
+        loaded = load_index(manifest, self.root)
+        self.assertEqual(loaded.files, index.files)
+        self.assertEqual(loaded.scanned, index.scanned)
+        self.assertIsNone(load_index(manifest, "elsewhere"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from file_index import FileIndex
+from fingerprint import build_asset_manifest, fingerprint_path
+from manifest import hash_file
+from template import Template, rewrite_asset_urls
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_fingerprint_path(self):
+        self.assertEqual(fingerprint_path("css/index.css", "3f9a1c2b77"), "css/index.3f9a1c2b.css")
+        self.assertEqual(fingerprint_path("LICENSE", "3f9a1c2b77"), "LICENSE.3f9a1c2b")
+
+    def test_build_asset_manifest(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "images"))
+            for name in ("index.css", os.path.join("images", "a.PNG"), "robots.txt"):
+                with open(os.path.join(root, name), "w") as f:
+                    f.write(name)
+            assets = build_asset_manifest(FileIndex.scan(root))
+            digest = hash_file(os.path.join(root, "images", "a.PNG"))
+        self.assertEqual(set(assets), {"index.css", "images/a.PNG"})
+        self.assertEqual(assets["images/a.PNG"], f"images/a.{digest[:8]}.PNG")
+
+    def test_rewrite_asset_urls(self):
+        assets = {"index.css": "index.1234abcd.css", "images/a.png": "images/a.5678ef00.png"}
+        html = '<link href="/index.css?v=1"><img src="/images/a.png"><a href="/other.css">x</a>'
+        self.assertEqual(
+            rewrite_asset_urls(html, assets),
+            '<link href="/index.1234abcd.css?v=1"><img src="/images/a.5678ef00.png"><a href="/other.css">x</a>',
+        )
+        self.assertEqual(rewrite_asset_urls(html, None), html)
+
+    def test_template_rewrites_before_basepath(self):
+        template = Template('<link href="/index.css">{{ Content }}', "/site/", assets={"index.css": "index.ab.css", "a.png": "a.cd.png"})
+        self.assertEqual(
+            template.render("T", '<img src="/a.png">'),
+            '<link href="/site/index.ab.css"><img src="/site/a.cd.png">',
+        )
+        self.assertEqual(template.refs, ["/index.css"])
+        chunks = []
+        template.stream(chunks.append, "T", lambda write: write('<img src="/a.png">'))
+        self.assertEqual("".join(chunks), '<link href="/site/index.ab.css"><img src="/site/a.cd.png">')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from file_index import FileIndex
+from front_matter import MetadataIndex, parse_front_matter, read_metadata, split_front_matter
+
+
+POST = """---
+title: "The Ring: A History"
+date: 2024-03-01
+tags: [elves, rings]
+draft: yes
+layout: layouts/post.html
+---
+# Heading
+
+Body
+"""
+
+
+class TestParseFrontMatter(unittest.TestCase):
+
+    def test_fields(self):
+        metadata, count = parse_front_matter(POST.split("\n"))
+        self.assertEqual(metadata, {
+            "title": "The Ring: A History",
+            "date": "2024-03-01",
+            "tags": ["elves", "rings"],
+            "draft": True,
+            "layout": "layouts/post.html",
+        })
+        self.assertEqual(count, 7)
+
+    def test_block_list_tags(self):
+        metadata, _ = parse_front_matter(["---", "tags:", "  - a", "  - b c", "draft: false", "---"])
+        self.assertEqual(metadata, {"tags": ["a", "b c"], "draft": False})
+        metadata, _ = parse_front_matter(["---", "tags:", "- a", "---"])
+        self.assertEqual(metadata, {"tags": ["a"]})
+
+    def test_draft_flags(self):
+        for value, flag in (("on", True), ("1", True), ("Yes", True), ('"true"', True),
+                            ("off", False), ("0", False), ("no", False), ("False", False)):
+            metadata, _ = parse_front_matter(["---", f"draft: {value}", "---"])
+            self.assertIs(metadata["draft"], flag, value)
+
+    def test_unknown_draft_value_is_reported(self):
+        with self.assertRaises(Exception) as context:
+            parse_front_matter(["---", "draft: maybe", "---"])
+        self.assertIn("draft: maybe", str(context.exception))
+
+    def test_no_front_matter(self):
+        self.assertEqual(parse_front_matter(["# Title", "---"]), ({}, 0))
+        self.assertEqual(parse_front_matter([]), ({}, 0))
+
+    def test_unclosed_block_is_text(self):
+        markdown = "---\ntitle: x\n\nbody"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_block_of_prose_is_body(self):
+        # Pages opening with a "---" paragraph render as they always did
+        for markdown in (
+            "---\n\n# Title\n\ntext\n\n---\n",
+            "---\nnot a field\n---\n# Title",
+            "---\n# comment: no\n---\n",
+            "---\n---\n# Title",
+            "---\n- item\n---\n",
+            # Only tags take a block list, so title and date stay strings
+            "---\ntitle:\n- a\n---\n# Title",
+            "---\ndate:\n  - 2024-03-01\n---\n",
+        ):
+            self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_split_front_matter(self):
+        metadata, body = split_front_matter(POST)
+        self.assertEqual(metadata["title"], "The Ring: A History")
+        self.assertEqual(body, "# Heading\n\nBody\n")
+        self.assertEqual(split_front_matter("# Plain"), ({}, "# Plain"))
+
+
+class TestMetadataIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_read_metadata_falls_back_to_h1(self):
+        self.assertEqual(read_metadata(self.write("a.md", "intro\n\n# Title\n\n# Other"))["title"], "Title")
+        self.assertEqual(read_metadata(self.write("b.md", "---\ndate: 2024-01-01\n---\n# Title"))["title"], "Title")
+        self.assertIsNone(read_metadata(self.write("c.md", "no heading"))["title"])
+        self.assertEqual(read_metadata(self.write("d.md", POST))["title"], "The Ring: A History")
+
+    def test_read_metadata_names_the_file_with_a_bad_draft(self):
+        path = self.write("e.md", "---\ndraft: maybe\n---\n# Title")
+        with self.assertRaises(Exception) as context:
+            read_metadata(path)
+        self.assertIn(path, str(context.exception))
+
+    def test_refresh_reuses_unchanged_entries(self):
+        post = self.write(os.path.join("blog", "post.md"), POST)
+        home = self.write("index.md", "# Home")
+        metadata = MetadataIndex()
+        metadata.refresh([post, home], FileIndex.scan(self.root))
+        stored = MetadataIndex.from_dict(metadata.to_dict())
+        stored.entries[home]["meta"]["title"] = "Cached"
+        self.write("index.md", "---\ndraft: true\n---\n# Home")
+        stored.refresh([post, home], FileIndex.scan(self.root))
+        self.assertEqual(stored.get(post)["title"], "The Ring: A History")
+        self.assertEqual(stored.get(home), {"draft": True, "title": "Home"})
+        self.assertEqual(stored.pages(), [])
+        self.assertEqual([src for src, _ in stored.pages(drafts=True)], [post, home])
+        self.assertEqual([src for src, _ in stored.pages(drafts=True, under=os.path.join(self.root, "blog"))], [post])
+
+    def test_refresh_drops_removed_sources(self):
+        home = self.write("index.md", "# Home")
+        metadata = MetadataIndex()
+        metadata.refresh([home])
+        metadata.refresh([])
+        self.assertEqual(metadata.get(home), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,11 @@
+import os
+import tempfile
 import unittest
-from generate_page import extract_title
+from contextlib import redirect_stdout
+from io import StringIO
+from generate_page import RenderOptions, extract_title, find_pages, generate_pages_recursive, render_page, stream_page
+from profiler import BuildProfile
+from template import Template
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -51,5 +57,126 @@ No h1 here!"""
         self.assertEqual(title, "This is **bold** and _italic_")
 
 
+class TestGeneratePages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css"><article>{{ Content }}</article>')
+        for i in range(12):
+            page_dir = os.path.join(self.content, "section", f"page{i}")
+            os.makedirs(page_dir)
+            with open(os.path.join(page_dir, "index.md"), "w") as f:
+                f.write(f"# Page {i}\n\nSee [home](/) and **item {i}**\n\n- a\n- b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_find_pages(self):
+        pages = find_pages(self.content, "docs")
+        self.assertEqual(len(pages), 12)
+        self.assertIn(
+            (os.path.join(self.content, "section", "page3", "index.md"),
+             os.path.join("docs", "section", "page3", "index.html")),
+            pages,
+        )
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, serial, "/site/")
+            generate_pages_recursive(self.content, self.template, parallel, "/site/", jobs=4)
+        serial_files = self.read_tree(serial)
+        self.assertEqual(len(serial_files), 12)
+        self.assertEqual(serial_files, self.read_tree(parallel))
+
+    def test_stages_run_without_manifest(self):
+        # The options also reach the worker processes
+        options = RenderOptions(minify=True, compress=True, search=True, links=True)
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        out = StringIO()
+        with redirect_stdout(out):
+            generate_pages_recursive(self.content, self.template, serial, "/site/", options=options)
+            generate_pages_recursive(self.content, self.template, parallel, "/site/", jobs=4, options=options)
+        serial_files = self.read_tree(serial)
+        self.assertIn(os.path.join("section", "page3", "index.html.gz"), serial_files)
+        self.assertIn(os.path.join("search", "pages.json"), serial_files)
+        self.assertEqual(serial_files, self.read_tree(parallel))
+        # Every page links to the missing home page, the template to the CSS
+        self.assertEqual(out.getvalue().count("Found 13 broken links"), 2)
+        self.assertNotIn("Skipped", out.getvalue())
+
+    def test_streamed_page_matches_rendered_page(self):
+        source = os.path.join(self.root, "big.md")
+        with open(source, "w") as f:
+            f.write("Intro [x](/a)\n\n# Big\n\n" + "\n\n".join(
+                f"Para {i} with ![img](/i{i}.png) and `code`\n\n- a\n- b\n\n```\nx = {i}\n```" for i in range(50)
+            ))
+        template = Template('<title>{{ Title }}</title><a href="/">h</a>{{ Content }}|{{ Content }}', "/base/")
+        rendered = os.path.join(self.root, "rendered.html")
+        streamed = os.path.join(self.root, "out", "streamed.html")
+        with redirect_stdout(StringIO()):
+            expected_refs = render_page(source, template, rendered)["refs"]
+        result = stream_page(source, template, streamed, BuildProfile())
+        profile = result["profile"]
+        with open(rendered) as a, open(streamed) as b:
+            expected = a.read()
+            self.assertEqual(expected, b.read())
+        self.assertEqual(result["refs"], expected_refs)
+        self.assertEqual(len(expected_refs), 51)
+        self.assertEqual(profile["counters"]["blocks"], 152)
+        self.assertEqual(profile["counters"]["bytes_written"], len(expected.encode()))
+        self.assertFalse(result["unchanged"])
+        self.assertTrue(stream_page(source, template, streamed)["unchanged"])
+        self.assertEqual(os.listdir(os.path.dirname(streamed)), ["streamed.html"])
+
+    def test_streamed_page_skips_front_matter(self):
+        source = os.path.join(self.root, "post.md")
+        with open(source, "w") as f:
+            f.write("---\ntitle: Front\ntags: [a]\n---\n# Heading\n\nBody")
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        rendered = os.path.join(self.root, "rendered.html")
+        streamed = os.path.join(self.root, "streamed.html")
+        with redirect_stdout(StringIO()):
+            render_page(source, template, rendered)
+        stream_page(source, template, streamed)
+        with open(rendered) as a, open(streamed) as b:
+            expected = a.read()
+            self.assertEqual(expected, "<title>Front</title><div><h1>Heading</h1><p>Body</p></div>")
+            self.assertEqual(expected, b.read())
+
+    def test_streamed_page_collects_links(self):
+        source = os.path.join(self.root, "links.md")
+        with open(source, "w") as f:
+            f.write("# Links\n\n[a](/a) [b](../b)\n\n![c](/c.png) [a](/a) [x](https://x.io)")
+        template = Template("{{ Title }}{{ Content }}")
+        with redirect_stdout(StringIO()):
+            rendered = render_page(source, template, os.path.join(self.root, "r.html"), RenderOptions(links=True))
+        streamed = stream_page(source, template, os.path.join(self.root, "s.html"), options=RenderOptions(links=True))
+        self.assertEqual(rendered["links"], ["/a", "../b", "/c.png"])
+        self.assertEqual(streamed["links"], rendered["links"])
+
+    def test_stream_page_without_title_raises(self):
+        source = os.path.join(self.root, "untitled.md")
+        with open(source, "w") as f:
+            f.write("no title")
+        with self.assertRaises(Exception):
+            stream_page(source, Template("{{ Content }}"), os.path.join(self.root, "x.html"))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
 from textnode import TextNode, TextType
@@ -121,6 +122,34 @@ class TestHTMLNode(unittest.TestCase):
             "<div><span><b>bold</b><i>italic</i></span><p>paragraph</p></div>"
         )
 
+    def test_base_node_to_html_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("p", "text").to_html()
+
+    def test_write_html_to_list(self):
+        parent = ParentNode("ul", [ParentNode("li", [LeafNode("b", "one")]), ParentNode("li", [LeafNode(None, "two")])])
+        chunks = []
+        parent.write_html(chunks.append)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), parent.to_html())
+        self.assertEqual(parent.to_html(), "<ul><li><b>one</b></li><li>two</li></ul>")
+
+    def test_write_html_to_file(self):
+        parent = ParentNode("div", [LeafNode("a", "link", {"href": "/x"})], {"class": "c"})
+        out = io.StringIO()
+        parent.write_html(out.write)
+        self.assertEqual(out.getvalue(), '<div class="c"><a href="/x">link</a></div>')
+
+    def test_deep_tree_to_html(self):
+        node = LeafNode(None, "x")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(node.to_html(), "<span>" * 200 + "x" + "</span>" * 200)
+
+    def test_nodes_are_slotted(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_text(self):
         node = TextNode("This is a text node", TextType.PLAIN_TEXT)
         html_node = text_node_to_html_node(node)
@@ -0,0 +1,77 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from links import LinkChecker, is_internal, link_locations, link_target, page_links, report_broken, resolve
+
+
+class TestLinks(unittest.TestCase):
+
+    def test_is_internal(self):
+        self.assertTrue(is_internal("/blog/tom"))
+        self.assertTrue(is_internal("../tom/?x=1#top"))
+        self.assertFalse(is_internal("https://example.com/"))
+        self.assertFalse(is_internal("//cdn.example.com/x.js"))
+        self.assertFalse(is_internal("mailto:me@example.com"))
+        self.assertFalse(is_internal("#top"))
+
+    def test_page_links_skip_code_and_external(self):
+        html = (
+            '<p><a href="/a">a</a><img src="/i.png" alt="i"><a href="https://x.io">x</a></p>'
+            '<pre><code>&lt;a href="/in-code"&gt;</code></pre><p><code>href="/inline"</code><a href="/a">again</a></p>'
+        )
+        self.assertEqual(page_links(html), ["/a", "/i.png"])
+
+    def test_resolve(self):
+        targets = {"index.html", "blog/tom/index.html", "images/tom.png"}
+        self.assertEqual(link_target("../tom", "/blog/majesty/"), "blog/tom")
+        self.assertEqual(resolve("/blog/tom", "/", targets), "blog/tom/index.html")
+        self.assertEqual(resolve("/blog/tom/#top", "/", targets), "blog/tom/index.html")
+        self.assertEqual(resolve("../tom/", "/blog/majesty/", targets), "blog/tom/index.html")
+        self.assertEqual(resolve("/", "/blog/tom/", targets), "index.html")
+        self.assertEqual(resolve("/images/tom%2Epng", "/", targets), "images/tom.png")
+        self.assertIsNone(resolve("/blog/tomm", "/", targets))
+        self.assertIsNone(resolve("/images/tom.png/", "/", targets))
+
+
+class TestLinkChecker(unittest.TestCase):
+
+    def test_rechecks_changed_pages_and_targets(self):
+        checker = LinkChecker()
+        checker.update("index.md", "/", ["/blog/tom", "/contact"])
+        checker.update("tom.md", "/blog/tom/", ["/"])
+        targets = {"index.html", "blog/tom/index.html"}
+        self.assertEqual(checker.check(targets), 2)
+        self.assertEqual(checker.broken(), [("index.md", "/contact")])
+
+        checker = LinkChecker(checker.to_dict())
+        self.assertEqual(checker.check(targets), 0)
+        self.assertEqual(checker.broken(), [("index.md", "/contact")])
+        # A new target fixes the link; only the page linking to it is checked
+        self.assertEqual(checker.check(targets | {"contact/index.html"}), 1)
+        self.assertEqual(checker.broken(), [])
+        # Removing a target breaks the links to it
+        self.assertEqual(checker.check({"index.html", "contact/index.html"}), 1)
+        self.assertEqual(checker.broken(), [("index.md", "/blog/tom")])
+        checker.remove("index.md")
+        self.assertEqual(checker.broken(), [])
+        self.assertNotIn("index.md", checker)
+
+    def test_report_locations(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            with open(source, "w") as f:
+                f.write("# Home\n\n[a](/gone) and [b](/site/x)\n\nAgain [a](/gone)\n")
+            self.assertEqual(link_locations(source, "/gone"), [f"{source}:3", f"{source}:5"])
+            self.assertEqual(link_locations(os.path.join(tmp, "missing.md"), "/gone"), [os.path.join(tmp, "missing.md")])
+            with redirect_stdout(io.StringIO()) as out:
+                report_broken([(source, "/gone"), (source, "/site/x")], "/site/")
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], f"{source}:3: broken link to /gone")
+        self.assertEqual(lines[2], f"{source}:3: broken link to /site/x (drop the /site/ prefix; it is added when rendering)")
+        self.assertEqual(lines[-1], "Found 2 broken links")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from listings import generate_listings, listing_html, plan_listings, post_month, slugify
+from template import Template
+
+
+def post(name, date=None, tags=()):
+    return {"url": f"/blog/{name}/", "title": name.title(), "date": date, "tags": list(tags)}
+
+
+POSTS = [
+    post("tom", "2024-03-01", ["Middle Earth", "hobbits"]),
+    post("majesty", "2024-03-20", ["middle-earth"]),
+    post("glorfindel", "2023-12-05"),
+    post("undated"),
+]
+
+
+class TestPlanListings(unittest.TestCase):
+
+    def test_helpers(self):
+        self.assertEqual(slugify("Middle Earth!"), "middle-earth")
+        self.assertEqual(post_month("2024-03-01"), "2024/03")
+        self.assertIsNone(post_month("March"))
+        self.assertIsNone(post_month(None))
+
+    def test_groups_and_pages(self):
+        listings = plan_listings(POSTS, "/blog/", per_page=2)
+        self.assertEqual(sorted(listings), [
+            "/blog/",
+            "/blog/archive/2023/12/",
+            "/blog/archive/2024/03/",
+            "/blog/page/2/",
+            "/blog/tags/hobbits/",
+            "/blog/tags/middle-earth/",
+        ])
+        first, second = listings["/blog/"], listings["/blog/page/2/"]
+        self.assertEqual([p["url"] for p in first["posts"]], ["/blog/majesty/", "/blog/tom/"])
+        self.assertEqual([p["url"] for p in second["posts"]], ["/blog/glorfindel/", "/blog/undated/"])
+        self.assertEqual((first["newer"], first["older"]), (None, "/blog/page/2/"))
+        self.assertEqual((second["newer"], second["older"]), ("/blog/", None))
+        self.assertEqual(second["title"], "Blog (page 2)")
+        # Named after the tag as the newest post spells it
+        self.assertEqual(listings["/blog/tags/middle-earth/"]["title"], "Posts tagged middle-earth")
+        self.assertEqual(len(listings["/blog/tags/middle-earth/"]["posts"]), 2)
+        self.assertEqual(listings["/blog/archive/2024/03/"]["title"], "Posts from 2024-03")
+
+    def test_empty_blog_has_an_index(self):
+        self.assertEqual(list(plan_listings([], "/blog/")), ["/blog/"])
+
+    def test_listing_html(self):
+        listing = plan_listings(POSTS[2:], "/blog/", per_page=1)["/blog/"]
+        self.assertEqual(
+            listing_html(listing),
+            '<div><h1>Blog</h1><ul><li><a href="/blog/glorfindel/">Glorfindel</a> '
+            '<time datetime="2023-12-05">2023-12-05</time></li></ul>'
+            '<nav><a href="/blog/page/2/" rel="next">Older posts</a></nav></div>',
+        )
+
+
+class TestGenerateListings(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}", "/site/")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, posts, state=None, **options):
+        with redirect_stdout(io.StringIO()) as out:
+            state = generate_listings(posts, "/blog/", self.dest, self.template, state, **options)
+        return state, out.getvalue()
+
+    def test_only_changed_listings_are_written(self):
+        state, output = self.generate(POSTS)
+        self.assertIn("Generated 5 listing pages", output)
+        with open(os.path.join(self.dest, "blog", "index.html")) as f:
+            self.assertIn('<a href="/site/blog/tom/">Tom</a>', f.read())
+        self.assertEqual(self.generate(POSTS, state)[1], "Skipped 5 unchanged listing pages\n")
+        # Retagging one post and removing another touches only the listings
+        # they were or are members of
+        changed = [post("tom", "2024-03-01", ["rings"])] + POSTS[2:]
+        state, output = self.generate(changed, state)
+        self.assertIn("Generated 3 listing pages", output)
+        self.assertIn("Skipped 1 unchanged listing pages", output)
+        self.assertEqual(output.count("Removing stale listing"), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "tags", "hobbits")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "tags", "rings", "index.html")))
+        # A different salt, such as a template change, regenerates everything
+        self.assertIn("Generated 4 listing pages", self.generate(changed, state, salt="new")[1])
+
+    def test_reserved_outputs_are_left_alone(self):
+        index_path = os.path.join(self.dest, "blog", "index.html")
+        state, output = self.generate(POSTS, reserved={index_path})
+        self.assertIn("Skipping listing /blog/", output)
+        self.assertNotIn(index_path, state)
+        self.assertFalse(os.path.exists(index_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from main import build, parse_args, watch_paths
+
+
+class TestBuild(unittest.TestCase):
+    # Drives build() in a throwaway site, as --watch does
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.write("template.html", '{{ include "partials/head.html" }}<title>{{ Title }}</title>{{ Content }}')
+        self.write(os.path.join("partials", "head.html"), '<link href="/index.css" rel="stylesheet">')
+        self.write(os.path.join("content", "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join("static", "index.css"), "body { color: red; }")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build(self, argv, changed=None):
+        with redirect_stdout(io.StringIO()) as out:
+            build(parse_args(argv + ["--no-cache"]), changed)
+        return out.getvalue()
+
+    def test_partial_change_rebuilds_and_is_watched(self):
+        self.build([])
+        partial = os.path.join("partials", "head.html")
+        self.assertIn(partial, watch_paths())
+        self.write(partial, "<meta>")
+        self.assertIn("Generating page", self.build([], [partial]))
+        self.assertTrue(self.read(os.path.join("docs", "index.html")).startswith("<meta>"))
+
+    def test_static_change_rerenders_fingerprinted_pages(self):
+        self.build(["--fingerprint"])
+        old_css = [name for name in os.listdir("docs") if name.startswith("index.") and name.endswith(".css")]
+        self.write(os.path.join("static", "index.css"), "body { color: blue; }")
+        output = self.build(["--fingerprint"], [os.path.join("static", "index.css")])
+        self.assertIn("Generating page", output)
+        html = self.read(os.path.join("docs", "index.html"))
+        new_css = [name for name in os.listdir("docs") if name.startswith("index.") and name.endswith(".css") and name not in old_css]
+        self.assertEqual(len(new_css), 1)
+        self.assertIn(f'href="/{new_css[0]}"', html)
+        self.assertTrue(os.path.exists(os.path.join("docs", new_css[0])))
+
+    def test_static_removal_is_link_checked(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\n![cat](/cat.png)")
+        self.write(os.path.join("static", "cat.png"), "png")
+        self.assertNotIn("broken link", self.build(["--check-links"]))
+        os.remove(os.path.join("static", "cat.png"))
+        output = self.build(["--check-links"], [os.path.join("static", "cat.png")])
+        self.assertIn("broken link to /cat.png", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,282 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from feeds import FeedOptions
+from generate_page import RenderOptions, generate_pages_recursive
+from listings import ListingOptions
+from manifest import load_manifest, save_manifest, hash_file
+
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".build", "manifest.json")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nBody")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, static_dir=None, options=None, **kwargs):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_pages_recursive(
+                self.content, self.template, self.dest, "/",
+                manifest_path=self.manifest, options=options, static_dir=static_dir, **kwargs)
+        return out.getvalue()
+
+    def test_minify_and_compress_outputs(self):
+        self.write(self.template, "<html>\n  <title>{{ Title }}</title>\n  {{ Content }}\n</html>\n")
+        self.build(options=RenderOptions(minify=True, compress=True))
+        output_path = os.path.join(self.dest, "index.html")
+        with open(output_path) as f:
+            self.assertEqual(f.read(), "<html> <title>Home</title> <div><h1>Home</h1><p>Welcome</p></div> </html>")
+        self.assertTrue(os.path.exists(output_path + ".gz"))
+        self.assertEqual(self.build(options=RenderOptions(minify=True, compress=True)).count("Generating page"), 0)
+        # Turning the options off rebuilds every page and drops the siblings
+        self.assertEqual(self.build().count("Generating page"), 2)
+        self.assertFalse(os.path.exists(output_path + ".gz"))
+
+    def test_first_build_generates_all_pages(self):
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "post", "index.html")))
+
+    def test_unchanged_build_skips_pages(self):
+        self.build()
+        output = self.build()
+        self.assertNotIn("Generating page", output)
+        self.assertIn("Skipped 2 unchanged pages", output)
+
+    def test_only_changed_page_is_regenerated(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome back")
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertIn(os.path.join(self.content, "index.md"), output)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn("Welcome back", f.read())
+
+    def test_identical_output_keeps_mtime(self):
+        self.build()
+        output_path = os.path.join(self.dest, "index.html")
+        os.utime(output_path, ns=(1, 1))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n\nWelcome\n")
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertIn("Left 1 pages with identical output untouched", output)
+        self.assertEqual(os.stat(output_path).st_mtime_ns, 1)
+
+    def test_search_index_follows_page_changes(self):
+        pages_json = os.path.join(self.dest, "search", "pages.json")
+        self.build(options=RenderOptions(search=True))
+        with open(pages_json) as f:
+            self.assertEqual(sorted(page[0] for page in json.load(f)), ["/", "/blog/post/"])
+        self.assertEqual(self.build(options=RenderOptions(search=True)).count("Generating page"), 0)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome zebra")
+        output = self.build(options=RenderOptions(search=True))
+        self.assertEqual(output.count("Generating page"), 1)
+        with open(os.path.join(self.dest, "search", "ze.json")) as f:
+            self.assertIn("zebra", json.load(f))
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.build(options=RenderOptions(search=True))
+        with open(pages_json) as f:
+            self.assertEqual([page[0] for page in json.load(f) if page], ["/"])
+        # Recording positions indexes every page again
+        output = self.build(options=RenderOptions(search=True, search_positions=True))
+        self.assertEqual(output.count("Generating page"), 1)
+        with open(os.path.join(self.dest, "search", "ze.json")) as f:
+            self.assertEqual(json.load(f), {"zebra": [0, 1, 2]})
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search")))
+
+    def test_front_matter_drafts_and_title(self):
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        output_path = os.path.join(self.dest, "blog", "post", "index.html")
+        self.write(post, "---\ntitle: Front\ndraft: true\n---\n# Post\n\nBody")
+        self.build()
+        self.assertFalse(os.path.exists(output_path))
+        self.assertEqual(load_manifest(self.manifest)["metadata"][post]["meta"]["draft"], True)
+        self.build(drafts=True)
+        with open(output_path) as f:
+            self.assertEqual(f.read(), "<title>Front</title><article><div><h1>Post</h1><p>Body</p></div></article>")
+        self.assertEqual(self.build(drafts=True).count("Generating page"), 0)
+        self.assertIn("Removing stale page", self.build())
+        self.assertFalse(os.path.exists(output_path))
+
+    def test_listings_follow_post_metadata(self):
+        blog = os.path.join(self.content, "blog")
+        post = os.path.join(blog, "post", "index.md")
+        self.write(post, "---\ndate: 2024-03-01\ntags: [rings]\n---\n# Post\n\nBody")
+        output = self.build(listings=ListingOptions(blog))
+        self.assertIn("Generated 3 listing pages", output)
+        with open(os.path.join(self.dest, "blog", "tags", "rings", "index.html")) as f:
+            self.assertIn('<a href="/blog/post/">Post</a>', f.read())
+        # A body edit rebuilds the post but none of the listings
+        self.write(post, "---\ndate: 2024-03-01\ntags: [rings]\n---\n# Post\n\nNew body")
+        output = self.build(listings=ListingOptions(blog))
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertIn("Skipped 3 unchanged listing pages", output)
+        self.write(post, "---\ndate: 2024-04-01\ntags: [rings]\n---\n# Post\n\nNew body")
+        output = self.build(listings=ListingOptions(blog))
+        self.assertIn("Generated 3 listing pages", output)
+        self.assertIn("Removing stale listing", output)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "archive", "2024", "04", "index.html")))
+        self.assertEqual(self.build().count("Removing stale listing"), 3)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+
+    def test_sitemap_and_feed_follow_pages(self):
+        blog = os.path.join(self.content, "blog")
+        sitemap = os.path.join(self.dest, "sitemap.xml")
+        feed = os.path.join(self.dest, "blog", "atom.xml")
+        self.write(os.path.join(blog, "post", "index.md"), "---\ndate: 2024-03-01\n---\n# Post\n\nBody")
+        options = {"feeds": FeedOptions("https://example.com", blog)}
+        self.assertIn("Updated 2 sitemap and feed files", self.build(**options))
+        with open(sitemap) as f:
+            self.assertIn("<url><loc>https://example.com/blog/post/</loc><lastmod>2024-03-01T00:00:00Z</lastmod></url>", f.read())
+        with open(feed) as f:
+            self.assertIn("<updated>2024-03-01T00:00:00Z</updated>", f.read())
+        # A body edit changes neither file
+        self.write(os.path.join(blog, "post", "index.md"), "---\ndate: 2024-03-01\n---\n# Post\n\nEdited")
+        self.assertNotIn("sitemap and feed", self.build(**options))
+        self.write(os.path.join(self.content, "about", "index.md"), "# About")
+        self.assertIn("Updated 1 sitemap and feed files", self.build(**options))
+        self.build()
+        self.assertFalse(os.path.exists(sitemap))
+        self.assertFalse(os.path.exists(feed))
+
+    def test_link_check_is_incremental(self):
+        static_dir = os.path.join(self.root, "static")
+        self.write(os.path.join(static_dir, "cat.png"), "png")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post) ![cat](/cat.png)")
+        output = self.build(static_dir, RenderOptions(links=True))
+        self.assertIn("Checked links on 2 pages", output)
+        self.assertNotIn("broken link", output)
+        self.assertNotIn("Checked links", self.build(static_dir, RenderOptions(links=True)))
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        os.remove(os.path.join(static_dir, "cat.png"))
+        output = self.build(static_dir, RenderOptions(links=True))
+        index = os.path.join(self.content, "index.md")
+        self.assertIn("Checked links on 1 pages", output)
+        self.assertIn(f"{index}:3: broken link to /blog/post", output)
+        self.assertIn(f"{index}:3: broken link to /cat.png", output)
+        # Still reported while broken, without checking the page again
+        output = self.build(static_dir, RenderOptions(links=True))
+        self.assertNotIn("Checked links", output)
+        self.assertIn("Found 2 broken links", output)
+        self.build(static_dir)
+        self.assertNotIn("links", load_manifest(self.manifest))
+
+    def test_template_change_regenerates_all_pages(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 2)
+
+    def test_section_template_rebuilds_only_its_pages(self):
+        self.build()
+        section_template = os.path.join(self.content, "blog", "template.html")
+        self.write(section_template, "<blog>{{ Content }}</blog>")
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 1)
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            self.assertEqual(f.read(), "<blog><div><h1>Post</h1><p>Body</p></div></blog>")
+        self.write(section_template, "<blog2>{{ Content }}</blog2>")
+        self.assertEqual(self.build().count("Generating page"), 1)
+        os.remove(section_template)
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 1)
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            self.assertTrue(f.read().startswith("<title>Post</title>"))
+
+    def test_partial_change_regenerates_pages(self):
+        partial = os.path.join(self.root, "footer.html")
+        self.write(partial, "<footer></footer>")
+        self.write(self.template, TEMPLATE + '{{ include "footer.html" }}')
+        self.build()
+        self.assertEqual(self.build().count("Generating page"), 0)
+        self.write(partial, "<footer>changed</footer>")
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 2)
+
+    def test_static_change_regenerates_only_referencing_pages(self):
+        static = os.path.join(self.root, "static")
+        self.write(os.path.join(static, "images", "a.png"), "png")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![a](/images/a.png)")
+        self.build(static)
+        self.write(os.path.join(static, "images", "a.png"), "new png")
+        output = self.build(static)
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertIn(os.path.join(self.content, "index.md"), output)
+
+    def test_basepath_change_regenerates_all_pages(self):
+        self.build()
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_pages_recursive(self.content, self.template, self.dest, "/site/", manifest_path=self.manifest)
+        self.assertEqual(out.getvalue().count("Generating page"), 2)
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.dest, "index.html"))
+        output = self.build()
+        self.assertEqual(output.count("Generating page"), 1)
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post", "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+
+class TestManifestFile(unittest.TestCase):
+
+    def test_load_missing_manifest(self):
+        self.assertEqual(load_manifest("/nonexistent/manifest.json"), {})
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sub", "manifest.json")
+            save_manifest({"pages": {"a.md": {"hash": "x"}}}, path)
+            self.assertEqual(load_manifest(path), {"pages": {"a.md": {"hash": "x"}}})
+
+    def test_load_corrupt_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.json")
+            with open(path, "w") as f:
+                f.write("{not json")
+            self.assertEqual(load_manifest(path), {})
+
+    def test_hash_file_changes_with_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a.md")
+            with open(path, "w") as f:
+                f.write("one")
+            first = hash_file(path)
+            with open(path, "w") as f:
+                f.write("two")
+            self.assertNotEqual(first, hash_file(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import io
 import unittest
-from split_delim import markdown_to_blocks
+from split_delim import markdown_to_blocks, iter_blocks
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -149,5 +150,30 @@ Final paragraph"""
         self.assertEqual(blocks[5], "Final paragraph")
 
 
+class TestIterBlocks(unittest.TestCase):
+
+    def assertMatchesSplit(self, md):
+        self.assertEqual(list(iter_blocks(io.StringIO(md))), markdown_to_blocks(md))
+
+    def test_matches_markdown_to_blocks(self):
+        self.assertMatchesSplit("# Heading\n\nParagraph\nline two\n\n- a\n- b\n")
+
+    def test_runs_of_blank_lines(self):
+        self.assertMatchesSplit("a\n\n\nb\n\n\n\n\nc")
+
+    def test_whitespace_only_lines(self):
+        self.assertMatchesSplit("a\n \nb\n\n   \n\nc  \n")
+
+    def test_empty_input(self):
+        self.assertEqual(list(iter_blocks(io.StringIO(""))), [])
+
+    def test_accepts_lines_without_newlines(self):
+        self.assertEqual(list(iter_blocks(["a", "b", "", "c"])), ["a\nb", "c"])
+
+    def test_is_lazy(self):
+        blocks = iter_blocks(iter(["first", "", "second"]))
+        self.assertEqual(next(blocks), "first")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,10 @@
 import unittest
-from markdown_to_html import markdown_to_html_node
+from enum import Enum
+import htmlnode
+import markdown_to_html
+import split_delim
+from htmlnode import LeafNode, ParentNode
+from markdown_to_html import markdown_to_html_node, register_block_type, register_inline_type
 
 
 class TestMarkdownToHTML(unittest.TestCase):
@@ -200,5 +205,37 @@ Visit [our site](https://example.com) for more info!"""
         )
 
 
+class CustomType(Enum):
+    NOTE = "note"
+    STRIKE = "strike"
+
+
+class TestRegistration(unittest.TestCase):
+
+    def tearDown(self):
+        markdown_to_html.BLOCK_BUILDERS.pop(CustomType.NOTE, None)
+        htmlnode.TEXT_HANDLERS.pop(CustomType.STRIKE, None)
+        split_delim._BLOCK_LEXERS.clear()
+        split_delim._INLINE_DELIMITERS[3:] = []
+
+    def test_custom_block_type(self):
+        def lex(block):
+            if block.startswith("!!! "):
+                return CustomType.NOTE, block[4:]
+            return None
+
+        def build(token, profile=None):
+            return ParentNode("aside", markdown_to_html.text_to_children(token, profile))
+
+        register_block_type(CustomType.NOTE, lex, build)
+        html = markdown_to_html_node("!!! Careful **now**\n\nplain").to_html()
+        self.assertEqual(html, "<div><aside>Careful <b>now</b></aside><p>plain</p></div>")
+
+    def test_custom_inline_type(self):
+        register_inline_type("~~", CustomType.STRIKE, lambda node: LeafNode("s", node.text))
+        html = markdown_to_html_node("a ~~gone~~ **b ~~c~~**").to_html()
+        self.assertEqual(html, "<div><p>a <s>gone</s> <b>b ~~c~~</b></p></div>")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,60 @@
+import gzip
+import os
+import tempfile
+import unittest
+from postprocess import compress_file, compressed_variants, is_compressible, minify_css, minify_html, minify_output
+
+
+class TestMinify(unittest.TestCase):
+
+    def test_minify_html_collapses_whitespace_and_comments(self):
+        html = "<p>a  <b>b</b>\n  <!-- note -->\n<i>c</i></p>\n"
+        self.assertEqual(minify_html(html), "<p>a <b>b</b> <i>c</i></p>")
+
+    def test_minify_html_keeps_preformatted_text(self):
+        html = "<div>\n  <pre><code>x\n    y</code></pre>\n<script>if (a  < b) {}</script></div>"
+        self.assertEqual(minify_html(html), "<div> <pre><code>x\n    y</code></pre> <script>if (a  < b) {}</script></div>")
+
+    def test_minify_html_keeps_conditional_comments(self):
+        self.assertEqual(minify_html("<!--[if IE]><p>x</p><![endif]-->"), "<!--[if IE]><p>x</p><![endif]-->")
+
+    def test_minify_css(self):
+        css = 'h1,\nh2 {\n  color: #fff; /* white */\n  font-family: "A  ;}", serif;\n}\n\na > b :hover { x: y }\n'
+        self.assertEqual(minify_css(css), 'h1,h2{color:#fff;font-family:"A  ;}",serif}a>b :hover{x:y}')
+
+    def test_minify_css_keeps_media_query_spaces(self):
+        self.assertEqual(
+            minify_css("@media screen and (max-width: 600px) {\n  a { b: c; }\n}"),
+            "@media screen and (max-width:600px){a{b:c}}",
+        )
+
+    def test_minify_output_by_extension(self):
+        self.assertEqual(minify_output("a.css", b"a { b: c; }"), b"a{b:c}")
+        self.assertEqual(minify_output("a.js", b"a  b"), b"a  b")
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_compressible(self):
+        self.assertTrue(is_compressible("docs/index.HTML"))
+        self.assertFalse(is_compressible("docs/images/a.png"))
+
+    def test_gzip_variant_is_deterministic(self):
+        first = dict(compressed_variants("index.html", b"<p>hi</p>" * 100))
+        second = dict(compressed_variants("index.html", b"<p>hi</p>" * 100))
+        self.assertEqual(first, second)
+        self.assertEqual(gzip.decompress(first["index.html.gz"]), b"<p>hi</p>" * 100)
+
+    def test_compress_file_matches_in_memory_variant(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "big.html")
+            data = b"<p>streamed</p>\n" * 100000
+            with open(path, "wb") as f:
+                f.write(data)
+            compress_file(path)
+            with open(path + ".gz", "rb") as f:
+                self.assertEqual(gzip.decompress(f.read()), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
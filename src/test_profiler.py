@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from contextlib import redirect_stdout
+from io import StringIO
+from profiler import BuildProfile, stage
+from markdown_to_html import markdown_to_html_node
+from generate_page import render_page
+from template import Template
+
+
+class TestBuildProfile(unittest.TestCase):
+
+    def test_stage_accumulates(self):
+        profile = BuildProfile()
+        with mock.patch("profiler.time.perf_counter", side_effect=[0.0, 1.0, 5.0, 7.5]):
+            with profile.stage("read"):
+                pass
+            with profile.stage("read"):
+                pass
+        self.assertEqual(profile.stages["read"], 3.5)
+
+    def test_stage_helper_without_profile(self):
+        with stage(None, "read"):
+            pass
+
+    def test_parse_excludes_inline(self):
+        profile = BuildProfile()
+        profile.stages["parse"] = 3.0
+        profile.stages["inline"] = 2.0
+        self.assertEqual(profile.exclusive_stages()["parse"], 1.0)
+
+    def test_add_page_merges_and_ranks(self):
+        profile = BuildProfile()
+        profile.add_page("a.md", {"stages": {"read": 0.1}, "counters": {"blocks": 2}})
+        profile.add_page("b.md", {"stages": {"read": 0.3}, "counters": {"blocks": 3}})
+        self.assertEqual(profile.counters["blocks"], 5)
+        self.assertAlmostEqual(profile.stages["read"], 0.4)
+        self.assertEqual(profile.slowest_pages(1), [("b.md", 0.3)])
+        report = profile.report()
+        self.assertIn("2 pages", report)
+        self.assertIn("blocks=5", report)
+        self.assertIn("b.md", report)
+
+    def test_parse_excludes_inline_once_across_pages(self):
+        profile = BuildProfile()
+        page = BuildProfile()
+        page.stages["parse"] = 1.0
+        page.stages["inline"] = 0.4
+        profile.add_page("a.md", page.to_dict(raw=True))
+        self.assertAlmostEqual(profile.to_dict()["stages"]["parse"], 0.6)
+        self.assertEqual(profile.slowest_pages(1), [("a.md", 1.0)])
+        self.assertIn(f"  {'parse':<10} {600.0:>10.1f}", profile.report())
+        # A page's own report subtracts inline too
+        self.assertAlmostEqual(page.to_dict()["stages"]["parse"], 0.6)
+
+    def test_markdown_counters(self):
+        profile = BuildProfile()
+        markdown_to_html_node("# Title\n\nSome **bold** text\n\n- a\n- b", profile)
+        self.assertEqual(profile.counters["blocks"], 3)
+        self.assertEqual(profile.counters["inline_nodes"], 6)
+        self.assertIn("inline", profile.stages)
+
+    def test_render_page_returns_profile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "index.md")
+            with open(src, "w") as f:
+                f.write("# Hi\n\ntext")
+            with redirect_stdout(StringIO()):
+                result = render_page(src, Template("{{ Title }}{{ Content }}"), os.path.join(tmp, "out", "index.html"), profile=True)["profile"]
+            self.assertEqual(result["counters"]["pages"], 1)
+            self.assertEqual(result["counters"]["bytes_written"], len("Hi<div><h1>Hi</h1><p>text</p></div>"))
+            for name in ("read", "blocks", "to_html", "template", "write"):
+                self.assertIn(name, result["stages"])
+            # Stages come back as timed, so add_page subtracts inline once
+            self.assertGreaterEqual(result["stages"]["parse"], result["stages"]["inline"])
+            json.dumps(result)
+
+
+if __name__ == "__main__":
+    unittest.main()
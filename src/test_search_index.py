@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import unittest
+from markdown_to_html import markdown_to_html_node
+from search_index import SearchIndex, TermCollector, node_terms, page_terms, shard_name
+
+
+class TestTerms(unittest.TestCase):
+
+    def test_page_terms_skip_tags_code_blocks_and_short_words(self):
+        html = '<div><h1>Hello World</h1><p>hello <a href="/x">there</a> a</p><pre><code>skip me</code></pre><p>World</p></div>'
+        self.assertEqual(page_terms(html), {"hello": 2, "world": 2, "there": 1})
+        self.assertEqual(page_terms(html, positions=True), {"hello": [0, 2], "world": [1, 4], "there": [3]})
+
+    def test_less_than_in_text_is_not_a_tag(self):
+        self.assertEqual(page_terms("<p>if x < yy then</p>", positions=True), {"if": [0], "yy": [1], "then": [2]})
+
+    def test_ascii_text_splits_like_the_pattern(self):
+        # The trailing "é", too short to be a term, sends the text through
+        # the pattern instead
+        text = "".join(chr(code) + "a" + chr(code) + "bc_9" for code in range(128) if chr(code) not in "<>")
+        self.assertEqual(page_terms(text, positions=True), page_terms(text + " é", positions=True))
+
+    def test_chunks_match_whole_fragment(self):
+        chunks = ["<div>", "<p>", "Elves and ", "<b>", "elves", "</b>", "</p>", "<pre>", "<code>", "x = 1", "</code>", "</pre>", "<p>", "end", "</p>", "</div>"]
+        for positions in (False, True):
+            collector = TermCollector(positions)
+            for chunk in chunks:
+                collector.feed(chunk)
+            self.assertEqual(dict(collector.terms), page_terms("".join(chunks), positions))
+
+    def test_node_terms_match_rendered_html(self):
+        markdown = (
+            "# Hello World\n\nhello **bold**world [there](/x) ![alt text](/a.png) `code`\n\n"
+            "```\nskip me\n```\n\n> quoted _words_\n\n- one item\n- two items\n\n1. first\n2. second"
+        )
+        node = markdown_to_html_node(markdown)
+        terms = node_terms(node)
+        self.assertEqual(terms, page_terms(node.to_html()))
+        self.assertEqual(node_terms(node, positions=True), page_terms(node.to_html(), positions=True))
+        self.assertNotIn("skip", terms)
+        self.assertNotIn("alt", terms)
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("éowyn"), "other")
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.dest, "search", name)) as f:
+            return json.load(f)
+
+    def test_url(self):
+        index = SearchIndex(self.dest)
+        self.assertEqual(index.url(os.path.join(self.dest, "index.html")), "/")
+        self.assertEqual(index.url(os.path.join(self.dest, "blog", "tom", "index.html")), "/blog/tom/")
+        self.assertEqual(index.url(os.path.join(self.dest, "about.html")), "/about.html")
+
+    def test_incremental_updates(self):
+        home = os.path.join(self.dest, "index.html")
+        post = os.path.join(self.dest, "post.html")
+        index = SearchIndex(self.dest)
+        index.update(home, "Home", {"hobbit": 3})
+        index.update(post, "Post", {"hobbit": 1, "ring": 1})
+        self.assertEqual(index.write(), 2)
+        self.assertEqual(self.read("ho.json"), {"hobbit": [0, 3, 1, 1]})
+        self.assertEqual(self.read("pages.json"), [["/", "Home"], ["/post.html", "Post"]])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "search", "search.js")))
+
+        index = SearchIndex.load(self.dest, index.to_dict())
+        self.assertIn(post, index)
+        index.update(post, "Post", {"ring": 2})
+        self.assertEqual(index.write(), 2)
+        self.assertEqual(self.read("ho.json"), {"hobbit": [0, 3]})
+        self.assertEqual(self.read("ri.json"), {"ring": [1, 2]})
+        # Postings stay in page id order when an earlier page is updated
+        index.update(home, "Home", {"ring": 1})
+        index.write()
+        self.assertEqual(self.read("ri.json"), {"ring": [0, 1, 1, 2]})
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search", "ho.json")))
+
+        index.remove(post)
+        index.write()
+        self.assertEqual(self.read("ri.json"), {"ring": [0, 1]})
+        self.assertEqual(self.read("pages.json"), [["/", "Home"], None])
+
+    def test_load_without_pages_starts_over(self):
+        state = {"pages": {"/": {"id": 0, "title": "Home", "shards": ["ho"]}}, "next_id": 1, "postings": "counts"}
+        index = SearchIndex.load(self.dest, state)
+        self.assertNotIn(os.path.join(self.dest, "index.html"), index)
+
+    def test_positions(self):
+        home = os.path.join(self.dest, "index.html")
+        post = os.path.join(self.dest, "post.html")
+        index = SearchIndex(self.dest, positions=True)
+        index.update(post, "Post", {"hobbit": [2]})
+        index.update(home, "Home", {"hobbit": [0, 3, 7]})
+        index.write()
+        index.update(post, "Post", {"hobbit": [1, 5]})
+        index.write()
+        self.assertEqual(self.read("ho.json"), {"hobbit": [0, 2, 1, 4, 1, 3, 0, 3, 4]})
+        self.assertIn(home, SearchIndex.load(self.dest, index.to_dict(), positions=True))
+        # Switching kinds drops the shards, which hold the other kind
+        index = SearchIndex.load(self.dest, index.to_dict())
+        self.assertNotIn(home, index)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search", "ho.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
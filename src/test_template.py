@@ -0,0 +1,186 @@
+import os
+import tempfile
+import unittest
+from template import LayoutResolver, Template, load_template, rewrite_root_paths
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_render_title_and_content(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(
+            template.render("Hello", "<p>Hi</p>"),
+            "<title>Hello</title><article><p>Hi</p></article>",
+        )
+
+    def test_render_repeated_placeholder(self):
+        template = Template("{{ Title }}|{{ Title }}|{{ Content }}")
+        self.assertEqual(template.render("T", "C"), "T|T|C")
+
+    def test_render_without_placeholders(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render("T", "C"), "<p>static</p>")
+
+    def test_basepath_applied_to_template(self):
+        template = Template('<link href="/index.css" />{{ Content }}', "/site/")
+        self.assertEqual(template.render("T", ""), '<link href="/site/index.css" />')
+
+    def test_basepath_applied_to_content(self):
+        template = Template("<article>{{ Content }}</article>", "/site/")
+        self.assertEqual(
+            template.render("T", '<a href="/blog">b</a><img src="/a.png" alt="a"></img>'),
+            '<article><a href="/site/blog">b</a><img src="/site/a.png" alt="a"></img></article>',
+        )
+
+    def test_default_basepath_leaves_paths(self):
+        html = '<a href="/blog">b</a>'
+        self.assertEqual(rewrite_root_paths(html, "/"), html)
+
+    def test_matches_sequential_replace(self):
+        source = '<title>{{ Title }}</title><link href="/x.css"><body>{{ Content }}</body>'
+        content = '<p><a href="/a">a</a> <img src="/i.png" alt=""></img></p>'
+        expected = source.replace("{{ Title }}", "Page").replace("{{ Content }}", content)
+        expected = expected.replace('href="/', 'href="/base/').replace('src="/', 'src="/base/')
+        self.assertEqual(Template(source, "/base/").render("Page", content), expected)
+
+    def test_load_template(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            template = load_template(path, "/")
+            self.assertEqual(template.path, path)
+            self.assertEqual(template.render("Hi", ""), "<h1>Hi</h1>")
+
+    def test_include_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "partials"))
+            path = os.path.join(tmp, "template.html")
+            header = os.path.join(tmp, "partials", "header.html")
+            nav = os.path.join(tmp, "partials", "nav.html")
+            with open(path, "w") as f:
+                f.write('{{ include "partials/header.html" }}<main>{{ Content }}</main>')
+            with open(header, "w") as f:
+                f.write('<header>{{ Title }}{{ include "nav.html" }}</header>')
+            with open(nav, "w") as f:
+                f.write('<a href="/">home</a>')
+            template = load_template(path, "/site/")
+            self.assertEqual(
+                template.render("T", "C"),
+                '<header>T<a href="/site/">home</a></header><main>C</main>',
+            )
+            self.assertEqual(template.dependencies, [path, header, nav])
+            self.assertEqual(template.refs, ["/"])
+
+    def test_include_cycle_raises(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write('{{ include "template.html" }}')
+            with self.assertRaises(Exception) as context:
+                load_template(path)
+            self.assertIn("include cycle", str(context.exception))
+
+
+class TestLayoutResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.root_template = os.path.join(self.root, "template.html")
+        self.write(
+            self.root_template,
+            "<title>{{ block title }}{{ Title }}{{ endblock }}</title>"
+            "{{ block body }}<article>{{ Content }}</article>{{ endblock }}",
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def page(self, *parts):
+        return os.path.join(self.content, *parts, "index.md")
+
+    def test_root_template_by_default(self):
+        layouts = LayoutResolver(self.root_template, self.content)
+        template = layouts.template_for(self.page("blog", "post"))
+        self.assertEqual(template.path, self.root_template)
+        self.assertEqual(template.render("T", "C"), "<title>T</title><article>C</article>")
+
+    def test_directory_template_overrides_parent(self):
+        blog_template = os.path.join(self.content, "blog", "template.html")
+        self.write(blog_template, "<blog>{{ Content }}</blog>")
+        layouts = LayoutResolver(self.root_template, self.content)
+        self.assertEqual(layouts.template_for(self.page("blog", "post")).path, blog_template)
+        self.assertEqual(layouts.template_for(self.page("blog")).path, blog_template)
+        self.assertEqual(layouts.template_for(self.page("contact")).path, self.root_template)
+        self.assertEqual(layouts.template_for(self.page("blog", "post")).render("T", "C"), "<blog>C</blog>")
+
+    def test_extends_overrides_blocks(self):
+        blog_template = os.path.join(self.content, "blog", "template.html")
+        self.write(blog_template, "{{ extends }}{{ block body }}<section>{{ Content }}</section>{{ endblock }}")
+        layouts = LayoutResolver(self.root_template, self.content, "/site/")
+        template = layouts.template_for(self.page("blog", "post"))
+        self.assertEqual(template.render("T", "C"), "<title>T</title><section>C</section>")
+        self.assertEqual(template.dependencies, [blog_template, self.root_template])
+
+    def test_multi_level_inheritance(self):
+        self.write(
+            os.path.join(self.content, "blog", "template.html"),
+            "{{ extends }}{{ block title }}Blog: {{ Title }}{{ endblock }}",
+        )
+        self.write(
+            os.path.join(self.content, "blog", "news", "template.html"),
+            "{{ extends }}{{ block body }}<news>{{ Content }}</news>{{ endblock }}",
+        )
+        layouts = LayoutResolver(self.root_template, self.content)
+        template = layouts.template_for(self.page("blog", "news", "today"))
+        self.assertEqual(template.render("T", "C"), "<title>Blog: T</title><news>C</news>")
+        self.assertEqual(len(template.dependencies), 3)
+
+    def test_layouts_compiled_once(self):
+        layouts = LayoutResolver(self.root_template, self.content)
+        first = layouts.template_for(self.page("a"))
+        second = layouts.template_for(self.page("b", "c"))
+        self.assertIs(first, second)
+        self.assertEqual(len(layouts.templates()), 1)
+
+    def test_front_matter_layout(self):
+        post_layout = os.path.join(self.root, "layouts", "post.html")
+        self.write(post_layout, "{{ extends }}{{ block title }}Post: {{ Title }}{{ endblock }}")
+        layouts = LayoutResolver(self.root_template, self.content)
+        template = layouts.template_for(self.page("blog", "post"), "layouts/post.html")
+        self.assertEqual(template.path, post_layout)
+        self.assertEqual(template.render("T", "C"), "<title>Post: T</title><article>C</article>")
+        with self.assertRaises(Exception):
+            layouts.template_for(self.page("a"), "layouts/missing.html")
+
+    def test_front_matter_layout_extends_root_template_once(self):
+        # Relative paths, as main passes them: the parent of layouts/post.html
+        # must be "template.html" itself, not "./template.html"
+        self.write(os.path.join(self.root, "layouts", "post.html"), "{{ extends }}{{ block title }}Post{{ endblock }}")
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            layouts = LayoutResolver("template.html", "content")
+            template = layouts.template_for(os.path.join("content", "post", "index.md"), "layouts/post.html")
+            layouts.template_for(os.path.join("content", "index.md"))
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(template.dependencies, [os.path.join("layouts", "post.html"), "template.html"])
+        self.assertEqual(sorted(t.path for t in layouts.templates()), [os.path.join("layouts", "post.html"), "template.html"])
+
+    def test_root_template_cannot_extend(self):
+        self.write(self.root_template, "{{ extends }}")
+        layouts = LayoutResolver(self.root_template, self.content)
+        with self.assertRaises(Exception):
+            layouts.template_for(self.page("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
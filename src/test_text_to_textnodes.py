@@ -134,6 +134,36 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertListEqual(expected, nodes)
 
+    def test_delimiters_inside_bold_are_literal(self):
+        nodes = text_to_textnodes("**a_b [x](y)** c")
+        expected = [
+            TextNode("a_b [x](y)", TextType.BOLD_TEXT),
+            TextNode(" c", TextType.PLAIN_TEXT),
+        ]
+        self.assertListEqual(expected, nodes)
+
+    def test_link_inside_code_is_literal(self):
+        nodes = text_to_textnodes("`[x](y)` [a](b)")
+        expected = [
+            TextNode("[x](y)", TextType.CODE_TEXT),
+            TextNode(" ", TextType.PLAIN_TEXT),
+            TextNode("a", TextType.LINK, "b"),
+        ]
+        self.assertListEqual(expected, nodes)
+
+    def test_unclosed_delimiter_inside_plain_segment_raises(self):
+        with self.assertRaises(Exception):
+            text_to_textnodes("**bold** then _open")
+
+    def test_empty_text(self):
+        self.assertListEqual([], text_to_textnodes(""))
+
+    def test_many_links(self):
+        text = " ".join(f"[l{i}](/p{i})" for i in range(50))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 99)
+        self.assertEqual(nodes[-1], TextNode("l49", TextType.LINK, "/p49"))
+
 
 if __name__ == "__main__":
     unittest.main()
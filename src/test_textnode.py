@@ -38,5 +38,11 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.BOLD_TEXT, "https://example.com")
         self.assertNotEqual(node, node2)
 
+    def test_slotted(self):
+        node = TextNode("This is a text node", TextType.BOLD_TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
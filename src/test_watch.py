@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from urllib.request import urlopen
+from watch import LiveReload, RELOAD_SCRIPT, changed_paths, make_server, snapshot, watch
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_snapshot_and_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sub", "a.md")
+            os.makedirs(os.path.dirname(path))
+            with open(path, "w") as f:
+                f.write("one")
+            before = snapshot([tmp])
+            self.assertIn(path, before)
+            with open(path, "w") as f:
+                f.write("three")
+            new_path = os.path.join(tmp, "b.md")
+            with open(new_path, "w") as f:
+                f.write("new")
+            self.assertEqual(changed_paths(before, snapshot([tmp])), sorted([path, new_path]))
+
+    def test_snapshot_single_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("x")
+            self.assertEqual(list(snapshot([path])), [path])
+
+
+class TestWatch(unittest.TestCase):
+
+    def test_burst_of_saves_triggers_one_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            calls = []
+            stop = threading.Event()
+
+            def on_change(changed):
+                calls.append(changed)
+                stop.set()
+
+            thread = threading.Thread(target=watch, args=([tmp], on_change, 0.02, 0.15, stop))
+            thread.start()
+            time.sleep(0.1)
+            for i in range(5):
+                with open(os.path.join(tmp, f"page{i}.md"), "w") as f:
+                    f.write("x")
+                time.sleep(0.01)
+            thread.join(5)
+            stop.set()
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(len(calls[0]), 5)
+
+    def test_callable_paths_follow_rebuilds(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = os.path.join(tmp, "template.html")
+            partial = os.path.join(tmp, "partials", "nav.html")
+            os.makedirs(os.path.dirname(partial))
+            for path in (first, partial):
+                with open(path, "w") as f:
+                    f.write("x")
+            paths = [first]
+            calls = []
+            stop = threading.Event()
+
+            def on_change(changed):
+                calls.append(changed)
+                # The rebuild discovers the partial
+                paths[:] = [first, partial]
+                if len(calls) == 2:
+                    stop.set()
+
+            thread = threading.Thread(target=watch, args=(lambda: list(paths), on_change, 0.02, 0.05, stop))
+            thread.start()
+            time.sleep(0.1)
+            with open(first, "w") as f:
+                f.write("first edit")
+            time.sleep(0.3)
+            with open(partial, "w") as f:
+                f.write("partial edit")
+            thread.join(5)
+            stop.set()
+            self.assertEqual(calls, [[first], [partial]])
+
+
+class TestLiveReload(unittest.TestCase):
+
+    def test_wait_returns_new_version(self):
+        live_reload = LiveReload()
+        threading.Timer(0.05, live_reload.notify).start()
+        self.assertEqual(live_reload.wait(0, timeout=5), 1)
+
+    def test_wait_times_out(self):
+        self.assertEqual(LiveReload().wait(0, timeout=0.01), 0)
+
+    def test_server_injects_reload_script(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "index.html"), "w") as f:
+                f.write("<html><body><p>hi</p></body></html>")
+            with open(os.path.join(tmp, "index.css"), "w") as f:
+                f.write("body {}")
+            server = make_server(tmp, 0, LiveReload())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                base = f"http://localhost:{server.server_address[1]}"
+                with urlopen(base + "/") as response:
+                    html = response.read().decode()
+                self.assertIn(RELOAD_SCRIPT + "</body>", html)
+                with urlopen(base + "/index.css") as response:
+                    self.assertEqual(response.read().decode(), "body {}")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import gzip
+import os
+import tempfile
+import unittest
+from writer import PageWriter, make_dirs, same_contents, write_if_changed, write_output
+
+
+class TestWriteIfChanged(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a", "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_creates_missing_parent(self):
+        self.assertTrue(write_if_changed(self.path, b"<p>hi</p>"))
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b"<p>hi</p>")
+
+    def test_identical_bytes_keep_mtime(self):
+        write_if_changed(self.path, b"same")
+        os.utime(self.path, ns=(1, 1))
+        self.assertFalse(write_if_changed(self.path, b"same"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1)
+        self.assertTrue(write_if_changed(self.path, b"diff"))
+        self.assertNotEqual(os.stat(self.path).st_mtime_ns, 1)
+
+    def test_same_contents(self):
+        self.assertFalse(same_contents(self.path, b""))
+        write_if_changed(self.path, b"abc")
+        self.assertTrue(same_contents(self.path, b"abc"))
+        self.assertFalse(same_contents(self.path, b"abd"))
+
+    def test_write_output_compresses_text(self):
+        self.assertTrue(write_output(self.path, b"<p>x</p>", compress=True))
+        with open(self.path + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), b"<p>x</p>")
+        os.remove(self.path + ".gz")
+        # Unchanged output, but its missing sibling is written again
+        self.assertFalse(write_output(self.path, b"<p>x</p>", compress=True))
+        self.assertTrue(os.path.exists(self.path + ".gz"))
+        image = os.path.join(self.tmp.name, "a", "x.png")
+        write_output(image, b"png", compress=True)
+        self.assertFalse(os.path.exists(image + ".gz"))
+
+    def test_make_dirs_creates_each_parent_once(self):
+        root = self.tmp.name
+        paths = [os.path.join(root, "x", "1.html"), os.path.join(root, "x", "2.html"), os.path.join(root, "y", "z", "3.html")]
+        created = make_dirs(paths)
+        self.assertEqual(created, {os.path.join(root, "x"), os.path.join(root, "y", "z")})
+        self.assertTrue(os.path.isdir(os.path.join(root, "y", "z")))
+
+
+class TestPageWriter(unittest.TestCase):
+
+    def test_writes_and_counts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f"{i}.html") for i in range(20)]
+            write_if_changed(paths[0], b"page 0")
+            with PageWriter(workers=2, max_pending=3) as writer:
+                for i, path in enumerate(paths):
+                    writer.write(path, f"page {i}".encode())
+            self.assertEqual((writer.written, writer.unchanged), (19, 1))
+            with open(paths[7], 'rb') as f:
+                self.assertEqual(f.read(), b"page 7")
+
+    def test_errors_raise_on_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = PageWriter()
+            # A directory cannot be opened for writing
+            writer.write(tmp, b"x")
+            with self.assertRaises(OSError):
+                writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
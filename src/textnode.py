@@ -9,7 +9,9 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
-    
+    # Slotted: one of these is allocated per inline span
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    '<script>new EventSource("' + RELOAD_PATH + '")'
+    '.onmessage = function () { location.reload(); };</script>'
+)
+
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+def changed_paths(old_state, new_state):
+    return sorted(
+        path for path in old_state.keys() | new_state.keys()
+        if old_state.get(path) != new_state.get(path)
+    )
+
+def _under(path, roots):
+    return any(path == root or path.startswith(root + os.sep) for root in roots)
+
+def watch(paths, on_change, interval=0.25, debounce=0.1, stop=None):
+    # Polls paths and calls on_change once per burst of edits. paths may be
+    # a callable returning the list instead, asked again after every change
+    # so the watch set can follow the build; newly watched files are not
+    # reported as changes themselves.
+    stop = stop or threading.Event()
+    watched_paths = paths() if callable(paths) else paths
+    state = snapshot(watched_paths)
+    while not stop.wait(interval):
+        current = snapshot(watched_paths)
+        if current == state:
+            continue
+        # Wait until a full debounce period passes without further changes
+        while not stop.wait(debounce):
+            settled = snapshot(watched_paths)
+            if settled == current:
+                break
+            current = settled
+        changed = changed_paths(state, current)
+        state = current
+        if changed:
+            on_change(changed)
+            if callable(paths):
+                new_paths = paths()
+                added = [path for path in new_paths if path not in watched_paths]
+                # Files edited during on_change keep their old state and are
+                # picked up by the next poll
+                state = {path: value for path, value in state.items() if _under(path, new_paths)}
+                state.update(snapshot(added))
+                watched_paths = new_paths
+
+class LiveReload:
+    def __init__(self):
+        self.version = 0
+        self._condition = threading.Condition()
+
+    def notify(self):
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout=None):
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, live_reload=None, **kwargs):
+        self.live_reload = live_reload
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        request_path = urlsplit(self.path).path
+        if request_path == RELOAD_PATH:
+            self._send_reload_events()
+            return
+        file_path = self.translate_path(self.path)
+        if request_path.endswith("/"):
+            file_path = os.path.join(file_path, "index.html")
+        if file_path.endswith(".html") and os.path.isfile(file_path):
+            self._send_html(file_path)
+            return
+        super().do_GET()
+
+    def _send_html(self, file_path):
+        with open(file_path, "rb") as f:
+            body = f.read()
+        script = RELOAD_SCRIPT.encode()
+        if b"</body>" in body:
+            body = body.replace(b"</body>", script + b"</body>", 1)
+        else:
+            body += script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        version = self.live_reload.version
+        try:
+            while True:
+                new_version = self.live_reload.wait(version, timeout=15)
+                if new_version != version:
+                    self.wfile.write(b"data: reload\n\n")
+                    version = new_version
+                else:
+                    # Keep-alive comment so proxies do not drop the stream
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(directory, port, live_reload, host="localhost"):
+    handler = partial(DevRequestHandler, directory=directory, live_reload=live_reload)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def watch_and_serve(rebuild, watch_paths, directory, port=8888, stop=None):
+    live_reload = LiveReload()
+    server = make_server(directory, port, live_reload)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    shown = watch_paths() if callable(watch_paths) else watch_paths
+    print(f"Serving {directory} at http://localhost:{server.server_address[1]}/ (watching {', '.join(shown)})")
+
+    def on_change(changed):
+        print(f"Detected {len(changed)} changed file(s), rebuilding...")
+        start = time.perf_counter()
+        try:
+            rebuild(changed)
+        except Exception as e:
+            print(f"Build failed: {e}")
+            return
+        print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+        live_reload.notify()
+
+    try:
+        watch(watch_paths, on_change, stop=stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
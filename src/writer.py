@@ -0,0 +1,100 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from postprocess import COMPRESSORS, compressed_variants, is_compressible
+
+DEFAULT_WORKERS = 4
+# Pages rendered but not yet written before write() blocks, which bounds the
+# memory held by the queue
+DEFAULT_MAX_PENDING = 64
+
+def same_contents(path, data):
+    # Compares sizes first so most changed files are told apart by one stat
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+def write_if_changed(path, data):
+    # Leaves the file, and with it its mtime, alone when it already holds
+    # data; returns whether it was written. The parent directory is expected
+    # to exist and is only created when it does not.
+    if same_contents(path, data):
+        return False
+    try:
+        f = open(path, 'wb')
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, 'wb')
+    with f:
+        f.write(data)
+    return True
+
+def write_output(path, data, compress=False):
+    # write_if_changed, plus the precompressed siblings of a compressible
+    # output when compress is set. Siblings are only recompressed when the
+    # output changed or one of them is missing.
+    written = write_if_changed(path, data)
+    if compress and is_compressible(path):
+        if written or not all(os.path.exists(path + suffix) for suffix in COMPRESSORS):
+            for variant_path, variant in compressed_variants(path, data):
+                write_if_changed(variant_path, variant)
+    return written
+
+def make_dirs(paths):
+    # Creates the parent directories of every path in one pass, each once
+    created = set()
+    for path in paths:
+        directory = os.path.dirname(path)
+        if directory and directory not in created:
+            os.makedirs(directory, exist_ok=True)
+            created.add(directory)
+    return created
+
+class PageWriter:
+    # Writes pages from a bounded pool of background threads so rendering
+    # continues while earlier pages are still being written, and compressed
+    # while compress is set. Errors are raised from close().
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING, compress=False):
+        self.compress = compress
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._futures = []
+        self.written = 0
+        self.unchanged = 0
+
+    def write(self, path, data):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(write_output, path, data, self.compress)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+        self._futures.append(future)
+
+    def _done(self, future):
+        self._slots.release()
+        if future.exception() is None:
+            with self._lock:
+                if future.result():
+                    self.written += 1
+                else:
+                    self.unchanged += 1
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()